@@ -5,31 +5,46 @@ Integrates existing calculation methods with robust stock file matching.
 
 import os
 import numpy as np
-import traceback
+import logging
 import pandas as pd
 import json
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify
+from functools import lru_cache
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import sys
-import io
-
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+# orjson serializes the float-heavy risk payloads (including NumPy scalars)
+# several times faster than Flask's stdlib-based jsonify
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Import from existing modules
 from utils.data_loader import load_stock_data, get_csv_file_mapping
 from models.risk_metrics import (
-    calculate_var,
-    calculate_cvar,
+    calculate_var_cvar,
     calculate_sharpe_ratio,
-    calculate_max_drawdown
+    calculate_max_drawdown,
+    calculate_max_drawdown_from_returns
 )
 from models.portfolio_prediction import predict_portfolio_risk
 
 # Import the StockMatcher from our new module
 from models.stock_matcher import StockMatcher
 
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'WARNING'))
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
+
+def json_response(payload):
+    """Serialize a response payload with orjson, falling back to jsonify."""
+    if not ORJSON_AVAILABLE:
+        return jsonify(payload)
+    body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return Response(body, mimetype='application/json')
+
 CORS(app, resources={r"/*": {"origins": "*", 
                               "allow_headers": ["Content-Type", "Authorization"]}})
 
@@ -40,158 +55,166 @@ STOCK_DATA_PATH = os.path.join(BASE_DIR, 'Scripts')
 # Initialize stock matcher
 stock_matcher = StockMatcher(STOCK_DATA_PATH)
 
+# Memoize symbol resolution: the set of stock files is fixed for the lifetime
+# of the process, so each distinct user-supplied name only needs matching once
+match_stock = lru_cache(maxsize=4096)(stock_matcher.get_matching_file)
+normalize_stock_name = lru_cache(maxsize=4096)(stock_matcher._normalize_stock_name)
+
 # Load stock data and mapping using existing functions
 try:
     stock_prices = load_stock_data(STOCK_DATA_PATH)
     stock_mapping = get_csv_file_mapping(STOCK_DATA_PATH)
     returns = stock_prices.pct_change().dropna()
-    print(f"Successfully loaded data for {len(stock_mapping)} stocks")
+    # Per-symbol values that do not change between requests
+    returns_arrays = {col: returns[col].to_numpy() for col in returns.columns}
+    returns_matrix = returns.to_numpy(dtype=np.float64)
+    returns_column_index = {col: i for i, col in enumerate(returns.columns)}
+    last_prices = stock_prices.iloc[-1].to_dict()
+    max_drawdowns = {col: calculate_max_drawdown(stock_prices[col]) for col in stock_prices.columns}
+    logger.info("Successfully loaded data for %d stocks", len(stock_mapping))
 except Exception as e:
-    print(f"Error loading initial data: {e}")
-    traceback.print_exc()
+    logger.exception("Error loading initial data: %s", e)
     # Initialize empty as backup
     stock_prices = None
     stock_mapping = {}
     returns = None
+    returns_arrays = {}
+    returns_matrix = None
+    returns_column_index = {}
+    last_prices = {}
+    max_drawdowns = {}
 
 @app.route('/calculate-risk', methods=['POST'])
 def calculate_risk():
     try:
         data = request.get_json()
-        print("Received request with data:", data)
+        logger.debug("Received calculate-risk request with data: %r", data)
 
         portfolio = data.get("portfolio", [])
         confidence_level = float(data.get("confidenceLevel", 95))
 
+        # Parse all quantities and buy prices in one conversion each
+        try:
+            quantities = np.array([stock["quantity"] for stock in portfolio], dtype=np.float64)
+            buy_prices = np.array([stock["buyPrice"] for stock in portfolio], dtype=np.float64)
+        except (KeyError, TypeError, ValueError):
+            return json_response({"error": "Each stock must have a numeric quantity and buyPrice"}), 400
+
+        if not (np.isfinite(quantities).all() and np.isfinite(buy_prices).all()):
+            return json_response({"error": "Each stock must have a numeric quantity and buyPrice"}), 400
+
         # Calculate total portfolio value
-        portfolio_value = sum(int(float(stock["quantity"])) * int(float(stock["buyPrice"])) for stock in portfolio)
+        portfolio_value = float(quantities @ buy_prices)
 
-        # Calculate individual stock values
+        # Resolve each stock once and calculate its position value
         stock_values = {}
-        for stock in portfolio:
+        resolved_stocks = []
+        for quantity, stock in zip(quantities, portfolio):
             stock_name = stock["stockName"]
             # Use stock matcher to get the proper stock display name
-            _, display_name = stock_matcher.get_matching_file(stock_name)
+            _, display_name = match_stock(stock_name)
             
             if not display_name:
-                print(f"Warning: No match found for stock {stock_name}")
+                logger.warning("No match found for stock %s", stock_name)
                 continue
                 
-            stock_values[stock_name] = int(float(stock["quantity"])) * stock_prices[display_name].iloc[-1]
-
-        # Individual stock risk metrics
-        risk_metrics = {}
-        for stock in portfolio:
-            stock_symbol = stock["stockName"]
-            # Use stock matcher to get the proper stock display name
-            _, display_name = stock_matcher.get_matching_file(stock_symbol)
-            
-            if not display_name or display_name not in returns.columns:
-                print(f"Warning: No return data for stock {stock_symbol}")
-                continue
-                
-            stock_returns = returns[display_name]
-            stock_value = stock_values.get(stock_symbol)
-            
-            if stock_value is None:
-                continue
-
-            risk_metrics[stock_symbol] = {
-                "VaR (₹)": calculate_var(stock_returns, stock_value, confidence_level),
-                "CVaR (₹)": calculate_cvar(stock_returns, stock_value, confidence_level),
-                "Sharpe Ratio": calculate_sharpe_ratio(stock_returns),
-                "Max Drawdown": calculate_max_drawdown(stock_prices[display_name])
-            }
+            stock_values[stock_name] = quantity * last_prices[display_name]
+            resolved_stocks.append((stock_name, display_name))
 
         # If we have no valid stocks, return an error
         if not stock_values:
-            return jsonify({
+            return json_response({
                 "error": "No valid stocks found in portfolio",
                 "availableStocks": stock_matcher.list_available_stocks()
             }), 400
 
-        # Portfolio-level metrics
+        # Individual stock risk metrics and portfolio weights
+        risk_metrics = {}
         weights = []
         selected_columns = []
         
-        for stock in portfolio:
-            stock_symbol = stock["stockName"]
-            
-            if stock_symbol not in stock_values:
-                continue
-                
-            # Use stock matcher to get the proper stock display name
-            _, display_name = stock_matcher.get_matching_file(stock_symbol)
-            
-            if not display_name:
+        for stock_symbol, display_name in resolved_stocks:
+            stock_value = stock_values[stock_symbol]
+            weights.append(stock_value / portfolio_value)
+            selected_columns.append(display_name)
+
+            if display_name not in returns_arrays:
+                logger.warning("No return data for stock %s", stock_symbol)
                 continue
                 
-            weights.append(stock_values[stock_symbol] / portfolio_value)
-            selected_columns.append(display_name)
+            stock_returns = returns_arrays[display_name]
+            stock_var, stock_cvar = calculate_var_cvar(stock_returns, stock_value, confidence_level)
+
+            risk_metrics[stock_symbol] = {
+                "VaR (₹)": stock_var,
+                "CVaR (₹)": stock_cvar,
+                "Sharpe Ratio": calculate_sharpe_ratio(stock_returns),
+                "Max Drawdown": max_drawdowns[display_name]
+            }
         
-        weights = np.array(weights)
+        weights = np.asarray(weights, dtype=np.float64)
         
         if len(selected_columns) == 0:
-            return jsonify({
+            return json_response({
                 "error": "No valid stocks found in portfolio",
                 "availableStocks": stock_matcher.list_available_stocks()
             }), 400
             
-        selected_returns = returns[selected_columns]
-        portfolio_returns = selected_returns.dot(weights)
+        # Single (T, k) @ (k,) product over the selected return columns. The
+        # weights are relative to the cost basis so VaR/CVaR come out in
+        # rupees; the drawdown below rescales them to sum to one
+        column_positions = [returns_column_index[col] for col in selected_columns]
+        portfolio_returns = returns_matrix[:, column_positions] @ weights
+        portfolio_var, portfolio_cvar = calculate_var_cvar(portfolio_returns, portfolio_value, confidence_level)
 
         portfolio_risk_metrics = {
             "Total Portfolio Value (₹)": round(portfolio_value, 2),
-            "VaR (₹)": calculate_var(portfolio_returns, portfolio_value, confidence_level),
-            "CVaR (₹)": calculate_cvar(portfolio_returns, portfolio_value, confidence_level),
+            "VaR (₹)": portfolio_var,
+            "CVaR (₹)": portfolio_cvar,
             "Sharpe Ratio": calculate_sharpe_ratio(portfolio_returns),
-            "Max Drawdown": calculate_max_drawdown(stock_prices.mean(axis=1))
+            "Max Drawdown": calculate_max_drawdown_from_returns(portfolio_returns / weights.sum())
         }
 
-        return jsonify({
+        return json_response({
             "individual_stocks": risk_metrics,
             "portfolio_summary": portfolio_risk_metrics
         })
 
     except Exception as e:
-        print("Error in calculating risk:", e)
-        traceback.print_exc()
-        return jsonify({"error": str(e)}), 500
+        logger.exception("Error in calculating risk: %s", e)
+        return json_response({"error": str(e)}), 500
     
 @app.route('/predict-portfolio', methods=['POST'])
 def predict_portfolio():
     try:
         data = request.get_json()
-        print("Received request in Flask predict-portfolio:", data)
+        logger.debug("Received predict-portfolio request with data: %r", data)
 
         # Extract data from the request
         portfolio_stocks = data.get("portfolio", [])
         confidence_level = float(data.get("confidenceLevel", 95)) / 100  # Convert percentage to decimal
         forecast_days = int(data.get("forecastDays", 30))
 
-        # Debug logging
-        print(f"Processing predict-portfolio with:")
-        print(f"- Portfolio stocks: {portfolio_stocks}")
-        print(f"- Confidence level: {confidence_level}")
-        print(f"- Forecast days: {forecast_days}")
+        logger.debug("Processing predict-portfolio: stocks=%r, confidence_level=%s, forecast_days=%s",
+                     portfolio_stocks, confidence_level, forecast_days)
             
         # Validate request data
         if not portfolio_stocks or not isinstance(portfolio_stocks, list) or len(portfolio_stocks) == 0:
-            return jsonify({"error": "Portfolio must be a non-empty list of stocks"}), 400
+            return json_response({"error": "Portfolio must be a non-empty list of stocks"}), 400
             
         # Validate each stock in the portfolio
         for stock in portfolio_stocks:
             if not isinstance(stock, dict):
-                return jsonify({"error": "Each stock must be an object"}), 400
+                return json_response({"error": "Each stock must be an object"}), 400
                 
             if 'stockName' not in stock or not stock['stockName']:
-                return jsonify({"error": "Each stock must have a stockName"}), 400
+                return json_response({"error": "Each stock must have a stockName"}), 400
                 
             if 'quantity' not in stock or not stock['quantity']:
-                return jsonify({"error": "Each stock must have a quantity"}), 400
+                return json_response({"error": "Each stock must have a quantity"}), 400
                 
             if 'buyPrice' not in stock or not stock['buyPrice']:
-                return jsonify({"error": "Each stock must have a buyPrice"}), 400
+                return json_response({"error": "Each stock must have a buyPrice"}), 400
 
         # Create a mapping of normalized stock names to file paths
         stock_file_mapping = {}
@@ -201,13 +224,13 @@ def predict_portfolio():
             stock_name = stock.get('stockName', '')
             
             # Use our enhanced stock matcher to find the file
-            file_path, display_name = stock_matcher.get_matching_file(stock_name)
+            file_path, display_name = match_stock(stock_name)
             
             if file_path and display_name:
-                print(f"Found match for '{stock_name}': {display_name} -> {file_path}")
+                logger.debug("Found match for '%s': %s -> %s", stock_name, display_name, file_path)
                 
                 # Add to the mapping in the format expected by predict_portfolio_risk
-                normalized_name = stock_matcher._normalize_stock_name(stock_name)
+                normalized_name = normalize_stock_name(stock_name)
                 # Ensure consistency with portfolio_prediction.normalize_stock_symbol
                 if normalized_name.endswith("ns"):
                   normalized_name = normalized_name[:-2]
@@ -216,12 +239,12 @@ def predict_portfolio():
                     "original_name": display_name
                 }
             else:
-                print(f"No match found for stock: {stock_name}")
+                logger.info("No match found for stock: %s", stock_name)
                 missing_stocks.append(stock_name)
         
         # Note: Missing stocks will be handled by portfolio_prediction.py via yfinance fallback
         if missing_stocks:
-            print(f"Stocks not found in CSV, will attempt live fetch: {missing_stocks}")
+            logger.info("Stocks not found in CSV, will attempt live fetch: %s", missing_stocks)
 
         # Call the portfolio prediction function
         try:
@@ -231,20 +254,18 @@ def predict_portfolio():
                 forecast_days=forecast_days,
                 confidence_level=confidence_level
             )
-            print("Prediction output:", output)
+            logger.debug("Prediction output: %r", output)
             # If the prediction function returned an error payload, surface it as a 400
             if isinstance(output, dict) and output.get("error"):
-                return jsonify(output), 400
-            return jsonify(output)
+                return json_response(output), 400
+            return json_response(output)
         except Exception as e:
-            print("Error in portfolio prediction function:", e)
-            traceback.print_exc()
-            return jsonify({"error": str(e)}), 500
+            logger.exception("Error in portfolio prediction function: %s", e)
+            return json_response({"error": str(e)}), 500
 
     except Exception as e:
-        print("Error in portfolio prediction route:", e)
-        traceback.print_exc()
-        return jsonify({"error": str(e)}), 500
+        logger.exception("Error in portfolio prediction route: %s", e)
+        return json_response({"error": str(e)}), 500
 
 @app.route('/api/available_stocks', methods=['GET'])
 def get_available_stocks():
@@ -253,22 +274,22 @@ def get_available_stocks():
     """
     try:
         stocks = stock_matcher.list_available_stocks()
-        return jsonify({
+        return json_response({
             "stocks": stocks,
             "count": len(stocks)
         })
     except Exception as e:
-        print(f"Error getting available stocks: {str(e)}")
-        traceback.print_exc()
-        return jsonify({"error": f"Failed to get available stocks: {str(e)}"}), 500
+        logger.exception("Error getting available stocks: %s", e)
+        return json_response({"error": f"Failed to get available stocks: {str(e)}"}), 500
 
 # Add a test route to verify the API is running
 @app.route('/test', methods=['GET'])
 def test_route():
-    return jsonify({
+    return json_response({
         "status": "Flask API is running",
         "availableStocks": len(stock_matcher.list_available_stocks())
     })
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', debug=True, port=5002)
\ No newline at end of file
+    # Development server only; use gunicorn (see gunicorn.conf.py) to serve
+    app.run(host='0.0.0.0', debug=os.getenv('FLASK_ENV') == 'dev', port=5002, threaded=True)
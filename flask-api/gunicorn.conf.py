@@ -0,0 +1,17 @@
+"""
+Gunicorn configuration for the RISKOS Flask API.
+"""
+
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5002")
+workers = int(os.getenv("GUNICORN_WORKERS", os.cpu_count() or 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+# Import app.py once in the master so the stock data loaded at startup is
+# shared copy-on-write by all workers instead of being re-read per worker
+preload_app = True
+
+# Portfolio prediction fits ARIMA/GARCH models per stock and can be slow
+timeout = 120
@@ -3,21 +3,44 @@ Advanced forecasting models for RISKOS portfolio prediction
 Includes LSTM, Prophet, and ensemble methods
 """
 
+import os
+import copy
+import hashlib
+import logging
+import threading
+from functools import lru_cache
 import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import stats
 from typing import Dict, List, Tuple, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
 # Try to import advanced libraries
 try:
     from sklearn.preprocessing import MinMaxScaler
-    from sklearn.ensemble import RandomForestRegressor
-    from sklearn.metrics import mean_squared_error
     SKLEARN_AVAILABLE = True
 except ImportError:
     SKLEARN_AVAILABLE = False
 
+try:
+    from statsmodels.tsa.arima.model import ARIMA
+    from statsmodels.stats.diagnostic import acorr_ljungbox, het_arch
+    from statsmodels.tsa.seasonal import STL
+    STATSMODELS_AVAILABLE = True
+except ImportError:
+    STATSMODELS_AVAILABLE = False
+
+try:
+    from arch import arch_model
+    ARCH_AVAILABLE = True
+except ImportError:
+    ARCH_AVAILABLE = False
+
 try:
     from prophet import Prophet
     PROPHET_AVAILABLE = True
@@ -32,12 +55,117 @@ try:
 except ImportError:
     TENSORFLOW_AVAILABLE = False
 
+if TENSORFLOW_AVAILABLE:
+    tf.keras.backend.set_floatx('float32')
+    # Half-precision compute on GPU tensor cores; the output layer stays float32
+    gpus = tf.config.list_physical_devices('GPU')
+    if gpus:
+        tf.keras.mixed_precision.set_global_policy('mixed_float16')
+        # Layers left in float32 use TF32 tensor cores on Ampere and newer
+        tf.config.experimental.enable_tensor_float_32_execution(True)
+        for gpu in gpus:
+            try:
+                tf.config.experimental.set_memory_growth(gpu, True)
+            except RuntimeError:
+                # Already initialized by an earlier import; keep its settings
+                pass
+    elif os.getenv('LSTM_BF16') == '1':
+        # bfloat16 on CPUs with native support. Opt-in: for this small LSTM
+        # the casts can cost more than the faster matmuls save
+        try:
+            with open('/proc/cpuinfo') as cpuinfo:
+                cpu_flags = cpuinfo.read()
+        except OSError:
+            cpu_flags = ''
+        if 'avx512_bf16' in cpu_flags or 'amx_bf16' in cpu_flags:
+            tf.keras.mixed_precision.set_global_policy('mixed_bfloat16')
+
+# Below this many observations the extra GARCH variants rarely beat
+# GARCH(1,1), so advanced_volatility_forecast fits only GARCH(1,1)
+GARCH_SEARCH_MIN_OBS = 500
+
+# A symbol's cached LSTM/GARCH fit is reused until this many new
+# observations have arrived since it was fitted, as long as the
+# observations it was fitted on are unchanged
+REFIT_MIN_NEW_OBS = 5
+
+# Keras model building, training and tf.function tracing are not safe to run
+# from several threads at once, so LSTM work is serialized across forecasters
+_KERAS_LOCK = threading.Lock()
+
+# Prophet's fit costs seconds per symbol. With RISKOS_STL_FORECAST=1 it only
+# runs on long histories (~3 trading years) and shorter series use the STL
+# decomposition in its place. Opt-in: that swaps the ensemble's third model,
+# not just its speed
+USE_STL_FORECAST = os.getenv('RISKOS_STL_FORECAST') == '1'
+PROPHET_MIN_OBS = 756
+
+@lru_cache(maxsize=256)
+def _fit_garch(returns_bytes: bytes, vol: str, p: int, q: int):
+    """Fit a GARCH variant, memoized on the raw bytes of the returns series"""
+    returns = np.frombuffer(returns_bytes, dtype=np.float64)
+    return arch_model(returns, vol=vol, p=p, q=q).fit(disp='off')
+
+def _has_residual_arch(fitted, lags: int = 2) -> bool:
+    """Ljung-Box test for ARCH effects left in a fit's squared standardized residuals"""
+    if not STATSMODELS_AVAILABLE:
+        return True
+    std_resid = np.asarray(fitted.std_resid)
+    std_resid = std_resid[np.isfinite(std_resid)]
+    pvalue = acorr_ljungbox(std_resid ** 2, lags=[lags])['lb_pvalue'].iloc[0]
+    return pvalue < 0.05
+
+def _has_arch_effect(returns: np.ndarray, lags: int = 5) -> bool:
+    """Engle's ARCH-LM test on demeaned returns; one OLS instead of a GARCH fit"""
+    if not STATSMODELS_AVAILABLE:
+        return True
+    pvalue = het_arch(returns - returns.mean(), nlags=lags)[1]
+    return pvalue < 0.05
+
+def _fingerprint(returns: pd.Series) -> bytes:
+    """Digest of a series' values and index, to tell whether data changed"""
+    row_hashes = pd.util.hash_pandas_object(returns, index=True).to_numpy()
+    return hashlib.blake2b(row_hashes.tobytes(), digest_size=16).digest()
+
 class AdvancedForecaster:
     """Advanced forecasting using multiple models"""
     
     def __init__(self):
         self.models = {}
         self.scalers = {}
+        # Guards self.models, which workers created by _for_worker share
+        self._models_lock = threading.Lock()
+        # Seeded generator so fallback forecasts are reproducible per forecaster
+        self._rng = np.random.default_rng(0xC0FFEE)
+    
+    def _for_worker(self, rng: np.random.Generator) -> 'AdvancedForecaster':
+        """Copy for one thread-pool task: shares the fit cache, draws noise from rng"""
+        worker = copy.copy(self)
+        worker._rng = rng
+        return worker
+    
+    def _reusable_fit(self, symbol: Optional[str], key: str, returns: pd.Series) -> Optional[Dict]:
+        """Return the cached fit for symbol if it is still fresh enough to reuse
+        
+        returns must extend the series the fit saw by fewer than
+        REFIT_MIN_NEW_OBS observations; a revised, shifted or differently
+        sourced history of similar length gets a new fit.
+        """
+        if symbol is None:
+            return None
+        with self._models_lock:
+            cached = self.models.get(symbol, {}).get(key)
+        if cached is None or not 0 <= len(returns) - cached['last_len'] < REFIT_MIN_NEW_OBS:
+            return None
+        if _fingerprint(returns.iloc[:cached['last_len']]) != cached['fingerprint']:
+            return None
+        return cached
+    
+    def _store_fit(self, symbol: str, key: str, returns: pd.Series, fit: Dict) -> None:
+        """Remember a fit of returns for symbol so later forecasts can reuse it"""
+        fit = dict(fit, last_len=len(returns), fingerprint=_fingerprint(returns))
+        with self._models_lock:
+            self.models.setdefault(symbol, {})[key] = fit
     
     def prepare_data(self, returns: pd.Series, lookback: int = 30) -> Tuple[np.ndarray, np.ndarray]:
         """Prepare data for machine learning models"""
@@ -47,72 +175,112 @@ class AdvancedForecaster:
         scaler = MinMaxScaler()
         scaled_data = scaler.fit_transform(data)
         
-        # Create sequences
-        X, y = [], []
-        for i in range(lookback, len(scaled_data)):
-            X.append(scaled_data[i-lookback:i, 0])
-            y.append(scaled_data[i, 0])
+        if len(scaled_data) <= lookback:
+            return np.empty((0, lookback), dtype=np.float32), np.empty(0, dtype=np.float32), scaler
+        
+        # Create sequences from a zero-copy sliding window. The float32 copy
+        # gives the LSTM a contiguous array in the dtype Keras computes in
+        windows = sliding_window_view(scaled_data[:, 0], lookback)
+        X = windows[:-1].astype(np.float32)
+        y = scaled_data[lookback:, 0].astype(np.float32)
         
-        return np.array(X), np.array(y), scaler
+        return X, y, scaler
     
-    def lstm_forecast(self, returns: pd.Series, forecast_days: int = 30) -> np.ndarray:
+    def lstm_forecast(self, returns: pd.Series, forecast_days: int = 30,
+                      symbol: Optional[str] = None) -> np.ndarray:
         """LSTM-based forecasting"""
         if not TENSORFLOW_AVAILABLE:
             raise RuntimeError("TensorFlow not available for LSTM forecasting")
         
         try:
-            # Prepare data
-            X, y, scaler = self.prepare_data(returns, lookback=30)
-            
-            if len(X) < 50:  # Need sufficient data
-                raise ValueError("Insufficient data for LSTM")
-            
-            # Reshape for LSTM
-            X = X.reshape((X.shape[0], X.shape[1], 1))
-            
-            # Split data
-            train_size = int(len(X) * 0.8)
-            X_train, X_test = X[:train_size], X[train_size:]
-            y_train, y_test = y[:train_size], y[train_size:]
-            
-            # Build LSTM model
-            model = Sequential([
-                LSTM(50, return_sequences=True, input_shape=(X.shape[1], 1)),
-                Dropout(0.2),
-                LSTM(50, return_sequences=False),
-                Dropout(0.2),
-                Dense(25),
-                Dense(1)
-            ])
-            
-            model.compile(optimizer='adam', loss='mean_squared_error')
-            
-            # Train model
-            model.fit(X_train, y_train, batch_size=32, epochs=50, verbose=0)
-            
-            # Make predictions
-            last_sequence = X[-1].reshape(1, X.shape[1], 1)
-            predictions = []
-            
-            for _ in range(forecast_days):
-                pred = model.predict(last_sequence, verbose=0)
-                predictions.append(pred[0, 0])
-                
-                # Update sequence
-                last_sequence = np.roll(last_sequence, -1, axis=1)
-                last_sequence[0, -1, 0] = pred[0, 0]
-            
-            # Inverse transform
-            predictions = np.array(predictions).reshape(-1, 1)
-            predictions = scaler.inverse_transform(predictions).flatten()
-            
-            return predictions
-            
+            # Only one thread at a time builds, trains or runs a Keras model
+            with _KERAS_LOCK:
+                return self._fit_and_rollout_lstm(returns, forecast_days, symbol)
+        
         except Exception as e:
-            print(f"LSTM forecasting error: {e}")
+            logger.warning("LSTM forecasting error: %s", e)
             # Fallback to simple trend
             return self.simple_trend_forecast(returns, forecast_days)
     
+    def _fit_and_rollout_lstm(self, returns: pd.Series, forecast_days: int,
+                              symbol: Optional[str]) -> np.ndarray:
+        """Body of lstm_forecast, run while holding _KERAS_LOCK"""
+        # Reuse a recent fit for this symbol and only rerun the rollout
+        # from the latest window
+        cached = self._reusable_fit(symbol, 'lstm', returns)
+        if cached is not None:
+            scaler = cached['scaler']
+            return self._lstm_rollout(cached['rollout'], self._lstm_start_window(returns, scaler),
+                                      scaler, forecast_days)
+        
+        # Prepare data
+        X, y, scaler = self.prepare_data(returns, lookback=30)
+        
+        if len(X) < 50:  # Need sufficient data
+            raise ValueError("Insufficient data for LSTM")
+        
+        # Reshape for LSTM
+        X = X.reshape((X.shape[0], X.shape[1], 1))
+        
+        # Split data
+        train_size = int(len(X) * 0.8)
+        X_train, X_test = X[:train_size], X[train_size:]
+        y_train, y_test = y[:train_size], y[train_size:]
+        
+        # Build and train LSTM model
+        model = self._build_lstm((X.shape[1], 1))
+        model.fit(X_train, y_train, batch_size=32, epochs=50, verbose=0)
+        
+        # Make predictions. The whole autoregressive rollout runs as one
+        # graph, so there is a single Python/TF crossing per forecast
+        # instead of one per step
+        @tf.function
+        def _rollout(sequence, steps):
+            preds = tf.TensorArray(tf.float32, size=steps)
+            for i in tf.range(steps):
+                pred = model(sequence, training=False)
+                sequence = tf.concat([sequence[:, 1:, :], tf.reshape(pred, (1, 1, 1))], axis=1)
+                preds = preds.write(i, pred[0, 0])
+            return preds.stack()
+        
+        if symbol is not None:
+            self._store_fit(symbol, 'lstm', returns, {
+                'model': model,
+                'rollout': _rollout,
+                'scaler': scaler
+            })
+        
+        return self._lstm_rollout(_rollout, self._lstm_start_window(returns, scaler), scaler, forecast_days)
+    
+    def _build_lstm(self, input_shape: Tuple[int, int]):
+        """Build a compiled LSTM model for input_shape"""
+        model = Sequential([
+            LSTM(50, return_sequences=True, input_shape=input_shape),
+            Dropout(0.2),
+            LSTM(50, return_sequences=False),
+            Dropout(0.2),
+            Dense(25),
+            Dense(1, dtype='float32')
+        ])
+        
+        model.compile(optimizer='adam', loss='mean_squared_error')
+        
+        return model
+    
+    def _lstm_start_window(self, returns: pd.Series, scaler, lookback: int = 30):
+        """Window the rollout starts from: the last input window prepare_data builds (X[-1])"""
+        window = scaler.transform(np.asarray(returns, dtype=np.float64)[-lookback - 1:-1].reshape(-1, 1))
+        return tf.constant(window.astype(np.float32).reshape(1, lookback, 1))
+    
+    def _lstm_rollout(self, rollout, last_sequence, scaler, forecast_days: int) -> np.ndarray:
+        """Autoregressive LSTM rollout from last_sequence, in return units"""
+        # steps goes in as a tensor so other horizons reuse the traced graph
+        predictions = rollout(last_sequence, tf.constant(forecast_days)).numpy().astype(np.float64)
+        
+        # Inverse transform
+        predictions = predictions.reshape(-1, 1)
+        return scaler.inverse_transform(predictions).flatten()
+    
     def prophet_forecast(self, returns: pd.Series, forecast_days: int = 30) -> np.ndarray:
         """Prophet-based forecasting"""
         if not PROPHET_AVAILABLE:
@@ -145,99 +313,169 @@ class AdvancedForecaster:
             return predictions
             
         except Exception as e:
-            print(f"Prophet forecasting error: {e}")
+            logger.warning("Prophet forecasting error: %s", e)
             # Fallback to simple trend
             return self.simple_trend_forecast(returns, forecast_days)
     
-    def ensemble_forecast(self, returns: pd.Series, forecast_days: int = 30) -> np.ndarray:
+    def stl_forecast(self, returns: pd.Series, forecast_days: int = 30, period: int = 5) -> np.ndarray:
+        """STL trend + seasonality forecast, a lightweight stand-in for Prophet"""
+        if not STATSMODELS_AVAILABLE:
+            raise RuntimeError("statsmodels not available for STL forecasting")
+        
+        if len(returns) < 2 * period:
+            raise ValueError("Insufficient data for STL")
+        
+        # Weekly seasonality over trading days
+        decomposition = STL(np.asarray(returns, dtype=np.float64), period=period).fit()
+        
+        # Average the seasonal profile over up to a year of recent cycles,
+        # ending on the last observation so it is in phase with the next step
+        n_cycles = max(1, min(52, len(returns) // period))
+        profile = decomposition.seasonal[-n_cycles * period:].reshape(n_cycles, period).mean(axis=0)
+        seasonal = np.resize(profile, forecast_days)
+        
+        # Extend a least-squares line through the recent trend component.
+        # With x centred on its mean the fit is two dot products; linregress
+        # also computes r, p-value and stderr, which are not used
+        trend = decomposition.trend[-90:]
+        x_mean = (len(trend) - 1) / 2
+        x_centred = np.arange(len(trend)) - x_mean
+        slope = (x_centred @ trend) / (x_centred @ x_centred)
+        intercept = trend.mean() - slope * x_mean
+        future = np.arange(len(trend), len(trend) + forecast_days)
+        
+        return intercept + slope * future + seasonal
+    
+    def ensemble_forecast(self, returns: pd.Series, forecast_days: int = 30,
+                          symbol: Optional[str] = None) -> np.ndarray:
         """Ensemble forecasting using multiple models"""
-        predictions = []
-        weights = []
+        # One row per model (ARIMA, LSTM, Prophet), filled as models succeed
+        predictions = np.empty((3, forecast_days), dtype=np.float64)
+        weights = np.zeros(3)
+        n_models = 0
         
         # ARIMA forecast
-        try:
-            from statsmodels.tsa.arima.model import ARIMA
-            arima_model = ARIMA(returns, order=(1, 0, 1))
-            arima_fit = arima_model.fit()
-            arima_pred = arima_fit.forecast(steps=forecast_days)
-            predictions.append(arima_pred.values)
-            weights.append(0.3)
-        except:
-            pass
+        if STATSMODELS_AVAILABLE:
+            try:
+                # A bare array skips statsmodels' pandas index handling
+                arima_model = ARIMA(np.asarray(returns, dtype=np.float64), order=(1, 0, 1))
+                arima_fit = arima_model.fit()
+                predictions[n_models] = arima_fit.forecast(steps=forecast_days)
+                weights[n_models] = 0.3
+                n_models += 1
+            except:
+                pass
         
         # LSTM forecast
         if TENSORFLOW_AVAILABLE:
             try:
-                lstm_pred = self.lstm_forecast(returns, forecast_days)
-                predictions.append(lstm_pred)
-                weights.append(0.4)
+                lstm_pred = self.lstm_forecast(returns, forecast_days, symbol)
+                predictions[n_models] = lstm_pred
+                weights[n_models] = 0.4
+                n_models += 1
             except:
                 pass
         
-        # Prophet forecast
-        if PROPHET_AVAILABLE:
+        # Prophet forecast, or (opt-in) the STL decomposition for shorter histories
+        use_stl = USE_STL_FORECAST and STATSMODELS_AVAILABLE and len(returns) <= PROPHET_MIN_OBS
+        if PROPHET_AVAILABLE and not use_stl:
             try:
                 prophet_pred = self.prophet_forecast(returns, forecast_days)
-                predictions.append(prophet_pred)
-                weights.append(0.3)
+                predictions[n_models] = prophet_pred
+                weights[n_models] = 0.3
+                n_models += 1
+            except:
+                pass
+        elif use_stl:
+            try:
+                stl_pred = self.stl_forecast(returns, forecast_days)
+                predictions[n_models] = stl_pred
+                weights[n_models] = 0.3
+                n_models += 1
             except:
                 pass
         
         # Simple trend as fallback
-        if not predictions:
-            trend_pred = self.simple_trend_forecast(returns, forecast_days)
-            predictions.append(trend_pred)
-            weights.append(1.0)
+        if n_models == 0:
+            return self.simple_trend_forecast(returns, forecast_days)
         
-        # Weighted average
-        weights = np.array(weights)
-        weights = weights / weights.sum()  # Normalize weights
+        # Weighted average as a single (M,) @ (M, forecast_days) product
+        weights = weights[:n_models] / weights[:n_models].sum()  # Normalize weights
         
-        ensemble_pred = np.zeros(forecast_days)
-        for pred, weight in zip(predictions, weights):
-            ensemble_pred += pred * weight
+        ensemble_pred = weights @ predictions[:n_models]
         
         return ensemble_pred
     
     def simple_trend_forecast(self, returns: pd.Series, forecast_days: int = 30) -> np.ndarray:
         """Simple trend-based forecasting as fallback"""
-        # Calculate recent trend
-        recent_returns = returns.tail(30)
+        # Calculate recent trend on the raw array; pandas reductions skip NaN
+        recent_returns = np.asarray(returns, dtype=np.float64)[-30:]
+        recent_returns = recent_returns[~np.isnan(recent_returns)]
         trend = recent_returns.mean()
-        volatility = recent_returns.std()
+        volatility = recent_returns.std(ddof=1)
         
         # Generate forecast with trend and noise
-        forecast = np.random.normal(trend, volatility, forecast_days)
+        forecast = self._rng.standard_normal(forecast_days) * volatility + trend
         
         return forecast
     
-    def advanced_volatility_forecast(self, returns: pd.Series, forecast_days: int = 30) -> np.ndarray:
+    def advanced_volatility_forecast(self, returns: pd.Series, forecast_days: int = 30,
+                                     symbol: Optional[str] = None) -> np.ndarray:
         """Advanced volatility forecasting using GARCH variants"""
+        if not ARCH_AVAILABLE:
+            # Fallback to simple volatility
+            return np.full(forecast_days, returns.std())
+        
         try:
-            from arch import arch_model
-            
-            # Try different GARCH models
-            models = [
-                arch_model(returns, vol='Garch', p=1, q=1),
-                arch_model(returns, vol='EGARCH', p=1, q=1),
-                arch_model(returns, vol='GARCH', p=2, q=2)
-            ]
-            
-            best_model = None
-            best_aic = float('inf')
-            
-            for model in models:
-                try:
-                    fitted = model.fit(disp='off')
-                    if fitted.aic < best_aic:
-                        best_aic = fitted.aic
-                        best_model = fitted
-                except:
-                    continue
-            
-            if best_model is None:
-                # Fallback to simple volatility
-                return np.full(forecast_days, returns.std())
+            cached = self._reusable_fit(symbol, 'garch', returns)
+            if cached is not None:
+                # Filter the new observations through the cached parameters
+                vol, p, q = cached['spec']
+                best_model = arch_model(returns, vol=vol, p=p, q=q).fix(cached['params'])
+            else:
+                # Without ARCH effects no GARCH variant beats a constant volatility
+                if not _has_arch_effect(np.asarray(returns, dtype=np.float64)):
+                    return np.full(forecast_days, returns.std())
+                
+                # Try different GARCH models; short series only get GARCH(1,1)
+                specs = [('Garch', 1, 1)]
+                if len(returns) >= GARCH_SEARCH_MIN_OBS:
+                    specs += [('EGARCH', 1, 1), ('GARCH', 2, 2)]
+                
+                # Fits are memoized on the series contents, so repeated
+                # forecasts of unchanged data skip the optimizer
+                returns_bytes = np.ascontiguousarray(returns, dtype=np.float64).tobytes()
+                
+                best_model = None
+                best_spec = None
+                best_aic = float('inf')
+                garch11 = None
+                
+                for spec in specs:
+                    # GARCH(2,2) only earns its extra lags when GARCH(1,1)
+                    # leaves ARCH effects in the residuals
+                    if spec[1] == 2 and garch11 is not None and not _has_residual_arch(garch11):
+                        continue
+                    try:
+                        fitted = _fit_garch(returns_bytes, *spec)
+                        if spec == ('Garch', 1, 1):
+                            garch11 = fitted
+                        if fitted.aic < best_aic:
+                            best_aic = fitted.aic
+                            best_model = fitted
+                            best_spec = spec
+                    except:
+                        continue
+                
+                if best_model is None:
+                    # Fallback to simple volatility
+                    return np.full(forecast_days, returns.std())
+                
+                if symbol is not None:
+                    self._store_fit(symbol, 'garch', returns, {
+                        'spec': best_spec,
+                        'params': best_model.params
+                    })
             
             # Forecast volatility
             forecast_result = best_model.forecast(horizon=forecast_days, reindex=False)
@@ -246,32 +484,39 @@ class AdvancedForecaster:
             return volatility_forecast
             
         except Exception as e:
-            print(f"Advanced volatility forecasting error: {e}")
+            logger.warning("Advanced volatility forecasting error: %s", e)
             # Fallback to simple volatility
             return np.full(forecast_days, returns.std())
 
 def enhanced_portfolio_forecast(returns_data: Dict[str, pd.Series], 
                                portfolio_weights: Dict[str, float],
                                forecast_days: int = 30,
-                               confidence_level: float = 0.95) -> Dict:
-    """Enhanced portfolio forecasting with multiple models"""
+                               confidence_level: float = 0.95,
+                               forecaster: Optional[AdvancedForecaster] = None) -> Dict:
+    """Enhanced portfolio forecasting with multiple models
+    
+    Pass the same forecaster across calls to reuse per-symbol LSTM/GARCH
+    fits when only a few new observations have arrived.
+    """
+    
+    if forecaster is None:
+        forecaster = AdvancedForecaster()
     
-    forecaster = AdvancedForecaster()
-    results = {}
+    # The confidence level is shared by every symbol
+    z_score = float(stats.norm.ppf(1 - confidence_level))
     
-    for symbol, returns in returns_data.items():
+    def forecast_symbol(symbol: str, returns: pd.Series, worker: AdvancedForecaster) -> Dict:
         try:
             # Ensemble forecast for returns
-            return_forecast = forecaster.ensemble_forecast(returns, forecast_days)
+            return_forecast = worker.ensemble_forecast(returns, forecast_days, symbol)
             
             # Advanced volatility forecast
-            volatility_forecast = forecaster.advanced_volatility_forecast(returns, forecast_days)
+            volatility_forecast = worker.advanced_volatility_forecast(returns, forecast_days, symbol)
             
             # Calculate risk metrics
-            z_score = stats.norm.ppf(1 - confidence_level)
             var_forecast = return_forecast.mean() + (z_score * volatility_forecast.mean())
             
-            results[symbol] = {
+            return {
                 'return_forecast': return_forecast,
                 'volatility_forecast': volatility_forecast,
                 'var_forecast': var_forecast,
@@ -280,15 +525,32 @@ def enhanced_portfolio_forecast(returns_data: Dict[str, pd.Series],
             }
             
         except Exception as e:
-            print(f"Error forecasting {symbol}: {e}")
+            logger.exception("Error forecasting %s: %s", symbol, e)
             # Fallback to simple forecast
-            simple_forecast = forecaster.simple_trend_forecast(returns, forecast_days)
-            results[symbol] = {
+            simple_forecast = worker.simple_trend_forecast(returns, forecast_days)
+            return {
                 'return_forecast': simple_forecast,
                 'volatility_forecast': np.full(forecast_days, returns.std()),
-                'var_forecast': simple_forecast.mean() + (stats.norm.ppf(1 - confidence_level) * returns.std()),
+                'var_forecast': simple_forecast.mean() + (z_score * returns.std()),
                 'expected_return': simple_forecast.mean(),
                 'expected_volatility': returns.std()
             }
     
+    if not returns_data:
+        return {}
+    
+    # Symbols are independent and statsmodels/arch run in native code, so
+    # overlap them on a thread pool. Each task gets its own forecaster copy
+    # and a child generator spawned in symbol order, so fallback noise does
+    # not depend on scheduling; the shared fit cache is locked and LSTM work
+    # is serialized by _KERAS_LOCK
+    rngs = forecaster._rng.spawn(len(returns_data))
+    max_workers = min(8, os.cpu_count() or 1, len(returns_data))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            symbol: executor.submit(forecast_symbol, symbol, returns, forecaster._for_worker(rng))
+            for (symbol, returns), rng in zip(returns_data.items(), rngs)
+        }
+        results = {symbol: future.result() for symbol, future in futures.items()}
+    
     return results
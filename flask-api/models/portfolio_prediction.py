@@ -5,56 +5,63 @@ Updated portfolio_prediction.py file to better handle stock name matching
 import os
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache, partial
 from statsmodels.tsa.arima.model import ARIMA
 from arch import arch_model
 from scipy import stats
+from scipy.special import ndtri
 from utils.data_providers import fetch_close_series, get_current_price
+from utils.data_loader import cached_folder_scan, read_price_csv
+from models.risk_metrics import calculate_var_cvar, calculate_sharpe_ratio
+import logging
 import warnings
 
 # Suppress warnings
 warnings.filterwarnings('ignore')
 
-def get_csv_file_mapping(folder_path):
-    """Create a mapping of stock symbols to their CSV file paths."""
-    file_mapping = {}
-    if not os.path.exists(folder_path):
-        raise FileNotFoundError(f"The folder '{folder_path}' does not exist.")
+logger = logging.getLogger(__name__)
 
-    print(f"Scanning folder: {folder_path}")
-    for file_name in os.listdir(folder_path):
-        if file_name.endswith('.csv'):
-            # Extract the stock symbol removing extension and _data
-            stock_symbol = file_name.split('_')[0].lower()  # Convert to lowercase for case-insensitive matching
-            file_mapping[stock_symbol] = {
-                "path": os.path.join(folder_path, file_name),
-                "original_name": file_name.split('_')[0]  # Keep the original name for reference
-            }
+def _scan_csv_files(folder_path):
+    file_mapping = {}
+    logger.debug("Scanning folder: %s", folder_path)
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.name.endswith('.csv'):
+                # Extract the stock symbol removing extension and _data
+                stock_symbol = entry.name.split('_')[0].lower()  # Convert to lowercase for case-insensitive matching
+                file_mapping[stock_symbol] = {
+                    "path": entry.path,
+                    "original_name": entry.name.split('_')[0]  # Keep the original name for reference
+                }
     
-    print(f"Found {len(file_mapping)} stock files in {folder_path}")
-    print(f"Available stocks: {list(file_mapping.keys())}")
+    logger.info("Found %d stock files in %s", len(file_mapping), folder_path)
+    logger.debug("Available stocks: %s", list(file_mapping.keys()))
     return file_mapping
 
-def calculate_var(returns, portfolio_value, confidence_level=95):
-    var_threshold = np.percentile(returns, 100 - confidence_level)
-    return round(var_threshold * portfolio_value, 2)
-
-def calculate_cvar(returns, portfolio_value, confidence_level=95):
-    var_threshold = np.percentile(returns, 100 - confidence_level)
-    cvar = returns[returns <= var_threshold].mean()
-    return round(cvar * portfolio_value, 2)
+def get_csv_file_mapping(folder_path):
+    """Create a mapping of stock symbols to their CSV file paths."""
+    if not os.path.exists(folder_path):
+        raise FileNotFoundError(f"The folder '{folder_path}' does not exist.")
 
-def calculate_sharpe_ratio(returns, risk_free_rate=0.05):
-    """Calculate Sharpe Ratio."""
-    excess_returns = returns.mean() - (risk_free_rate / 252)
-    return round(excess_returns / returns.std(), 2)
+    return cached_folder_scan(folder_path, _scan_csv_files)
 
 def calculate_max_drawdown(returns):
-    """Calculate Maximum Drawdown."""
-    cum_returns = (1 + returns / 100).cumprod()
-    running_max = cum_returns.cummax()
-    drawdown = (cum_returns - running_max) / running_max
-    return round(drawdown.min() * 100, 4)
+    """Calculate Maximum Drawdown from percent returns, as a percentage.
+
+    Unlike risk_metrics.calculate_max_drawdown, which takes prices and
+    returns a fraction, this compounds the returns first.
+    """
+    # Plain ndarray scans, reusing one buffer for the growth factors and the
+    # drawdowns; the Series versions add an index per intermediate
+    cum_returns = np.divide(np.ascontiguousarray(returns, dtype=np.float64), 100)
+    cum_returns += 1
+    np.cumprod(cum_returns, out=cum_returns)
+    running_max = np.maximum.accumulate(cum_returns)
+    cum_returns -= running_max
+    cum_returns /= running_max
+    return round(cum_returns.min() * 100, 4)
 
 def normalize_stock_symbol(symbol):
     """Normalize stock symbol to match StockMatcher mapping.
@@ -71,18 +78,136 @@ def normalize_stock_symbol(symbol):
     s = s.replace('.', '').replace(' ', '')
     return s
 
+@lru_cache(maxsize=512)
+def _load_close_series(csv_path, mtime):
+    """Load the cleaned Close series from a price CSV, or None if unusable.
+
+    Memoized on (path, mtime) so repeated requests reuse one parse while an
+    updated file is re-read. Callers must not modify the returned Series.
+    """
+    logger.debug("Loading data from %s", csv_path)
+    try:
+        # Only Date and Close are used; skipping other columns saves parsing
+        stock_df = read_price_csv(csv_path, usecols=['Date', 'Close'], parse_dates=['Date'])
+    except ValueError:
+        # Different layout; read everything and look for a price column
+        stock_df = read_price_csv(csv_path, parse_dates=['Date'])
+    if 'Close' not in stock_df.columns:
+        price_columns = [col for col in stock_df.columns if 'close' in col.lower() or 'price' in col.lower()]
+        if price_columns:
+            stock_df['Close'] = stock_df[price_columns[0]]
+        elif len(stock_df.columns) >= 3:
+            stock_df['Close'] = stock_df.iloc[:, 2]
+        else:
+            logger.warning("No suitable price column found in %s", csv_path)
+            return None
+    stock_df['Close'] = pd.to_numeric(stock_df['Close'], errors='coerce')
+    stock_df.dropna(subset=['Close'], inplace=True)
+    if stock_df.empty:
+        return None
+    if 'Date' in stock_df.columns:
+        stock_df.set_index('Date', inplace=True)
+    return stock_df['Close']
+
+def load_close_series(csv_path):
+    """Cached Close series for csv_path, refreshed when the file changes."""
+    return _load_close_series(csv_path, os.path.getmtime(csv_path))
+
+def _returns_from_close(close_series):
+    """Percent returns between consecutive closes, indexed by the later date."""
+    close = close_series.to_numpy(dtype=np.float64)
+    return pd.Series((close[1:] / close[:-1] - 1.0) * 100.0, index=close_series.index[1:],
+                     name=close_series.name)
+
+def _json_number(value):
+    """value as an int when it is integral, so 10 stays 10 rather than 10.0 in JSON."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+def _load_portfolio_stock(stock, stock_file_mapping):
+    """Resolve one portfolio entry and load its returns.
+
+    Returns (symbol, quantity, buy_price, current_price, returns), or None if
+    the entry is invalid or no usable price data is found.
+    """
+    # Get and normalize stock name for case-insensitive matching
+    raw_symbol = stock.get('stockName', '')
+    symbol = normalize_stock_symbol(raw_symbol)
+    
+    logger.debug("Looking for stock: '%s' (normalized: '%s')", raw_symbol, symbol)
+    
+    # Get quantity and buy_price
+    quantity = stock.get('quantity', 0)
+    buy_price = stock.get('buyPrice', 0)
+    
+    # Ensure we have numeric types
+    try:
+        quantity = float(quantity)
+        buy_price = float(buy_price)
+    except (ValueError, TypeError):
+        logger.warning("Invalid quantity (%s) or buy price (%s) for %s. Skipping...", quantity, buy_price, symbol)
+        return None
+    
+    logger.debug("Processing stock: %s, quantity: %s, buy_price: %s", symbol, quantity, buy_price)
+    
+    # Check if the stock exists in our mapping
+    use_live = False
+    if not symbol or symbol not in stock_file_mapping:
+        # Try alternative forms of the stock symbol
+        alternative_symbols = [
+            symbol.upper(),
+            symbol.lower(),
+            f"{symbol.upper()}.ns",
+            f"{symbol.lower()}.ns",
+            symbol.replace('.ns', '').lower()
+        ]
+        
+        found = False
+        for alt_symbol in alternative_symbols:
+            normalized_alt = normalize_stock_symbol(alt_symbol)
+            if normalized_alt in stock_file_mapping:
+                symbol = normalized_alt
+                logger.debug("Found alternative match: '%s' -> '%s'", alt_symbol, symbol)
+                found = True
+                break
+        
+        if not found:
+            logger.info("No data file found for %s. Falling back to live fetch.", raw_symbol)
+            use_live = True
+
+    try:
+        if use_live:
+            close_series = fetch_close_series(raw_symbol)
+            close_series = close_series.dropna()
+            current_price = float(close_series.iloc[-1])
+            returns = _returns_from_close(close_series)
+        else:
+            # Load and process stock data
+            close_series = load_close_series(stock_file_mapping[symbol]["path"])
+            if close_series is None:
+                logger.warning("No valid data found for %s after cleaning. Skipping...", symbol)
+                return None
+            current_price = close_series.iloc[-1]
+            returns = _returns_from_close(close_series)
+        return symbol, quantity, buy_price, current_price, returns
+
+    except Exception as e:
+        logger.error("Error processing %s: %s", symbol, e)
+        return None
+
 def predict_portfolio_risk(stock_file_mapping, portfolio_stocks, forecast_days=30, confidence_level=0.95):
     """Main prediction function."""
     # Debug the input parameters
-    print(f"predict_portfolio_risk called with:")
-    print(f"- {len(portfolio_stocks)} stocks in portfolio: {[stock.get('stockName', '') for stock in portfolio_stocks]}")
-    print(f"- forecast_days: {forecast_days}")
-    print(f"- confidence_level: {confidence_level}")
-    print(f"- available stock symbols: {list(stock_file_mapping.keys())}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("predict_portfolio_risk called with %d stocks %s, forecast_days=%s, confidence_level=%s, "
+                     "available symbols=%s", len(portfolio_stocks),
+                     [stock.get('stockName', '') for stock in portfolio_stocks],
+                     forecast_days, confidence_level, list(stock_file_mapping.keys()))
     
     stock_results = {}
     all_returns_data = {}
     stock_weights = {}
+    current_prices = {}
     portfolio_value = 0
     total_profit_loss = 0
     
@@ -90,94 +215,28 @@ def predict_portfolio_risk(stock_file_mapping, portfolio_stocks, forecast_days=3
     output_dir = "portfolio_analysis_outputs"
     os.makedirs(output_dir, exist_ok=True)
 
-    # Load data and calculate metrics
-    for stock in portfolio_stocks:
-        # Get and normalize stock name for case-insensitive matching
-        raw_symbol = stock.get('stockName', '')
-        symbol = normalize_stock_symbol(raw_symbol)
-        
-        print(f"Looking for stock: '{raw_symbol}' (normalized: '{symbol}')")
-        
-        # Get quantity and buy_price
-        quantity = stock.get('quantity', 0)
-        buy_price = stock.get('buyPrice', 0)
-        
-        # Ensure we have numeric types
-        try:
-            quantity = int(quantity)
-            buy_price = int(buy_price)
-        except (ValueError, TypeError):
-            print(f"Invalid quantity ({quantity}) or buy price ({buy_price}) for {symbol}. Skipping...")
+    # Load data and calculate metrics. Each stock is an independent CSV read
+    # or live fetch, so overlap them on a thread pool; results keep input order
+    max_workers = min(8, len(portfolio_stocks)) or 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        loaded = list(executor.map(partial(_load_portfolio_stock, stock_file_mapping=stock_file_mapping),
+                                   portfolio_stocks))
+
+    for result in loaded:
+        if result is None:
             continue
-        
-        print(f"Processing stock: {symbol}, quantity: {quantity}, buy_price: {buy_price}")
-        
-        # Check if the stock exists in our mapping
-        use_live = False
-        if not symbol or symbol not in stock_file_mapping:
-            # Try alternative forms of the stock symbol
-            alternative_symbols = [
-                symbol.upper(),
-                symbol.lower(),
-                f"{symbol.upper()}.ns",
-                f"{symbol.lower()}.ns",
-                symbol.replace('.ns', '').lower()
-            ]
-            
-            found = False
-            for alt_symbol in alternative_symbols:
-                normalized_alt = normalize_stock_symbol(alt_symbol)
-                if normalized_alt in stock_file_mapping:
-                    symbol = normalized_alt
-                    print(f"Found alternative match: '{alt_symbol}' -> '{symbol}'")
-                    found = True
-                    break
-            
-            if not found:
-                print(f"No data file found for {raw_symbol}. Falling back to live fetch.")
-                use_live = True
+        symbol, quantity, buy_price, current_price, returns = result
 
-        try:
-            if use_live:
-                close_series = fetch_close_series(raw_symbol)
-                current_price = float(close_series.iloc[-1])
-                returns = (close_series.pct_change() * 100).dropna()
-            else:
-                # Load and process stock data
-                csv_path = stock_file_mapping[symbol]["path"]
-                print(f"Loading data from {csv_path}")
-                stock_df = pd.read_csv(csv_path, parse_dates=['Date'])
-                if 'Close' not in stock_df.columns:
-                    price_columns = [col for col in stock_df.columns if 'close' in col.lower() or 'price' in col.lower()]
-                    if price_columns:
-                        stock_df['Close'] = stock_df[price_columns[0]]
-                    elif len(stock_df.columns) >= 3:
-                        stock_df['Close'] = stock_df.iloc[:, 2]
-                    else:
-                        print(f"No suitable price column found in {csv_path}")
-                        continue
-                stock_df['Close'] = pd.to_numeric(stock_df['Close'], errors='coerce')
-                stock_df.dropna(subset=['Close'], inplace=True)
-                if stock_df.empty:
-                    print(f"No valid data found for {symbol} after cleaning. Skipping...")
-                    continue
-                if 'Date' in stock_df.columns:
-                    stock_df.set_index('Date', inplace=True)
-                current_price = stock_df['Close'].iloc[-1]
-                returns = (stock_df['Close'].pct_change() * 100).dropna()
-            position_value = current_price * quantity
-            portfolio_value += position_value
-            profit_loss = (current_price - buy_price) * quantity
-            total_profit_loss += profit_loss
-
-            all_returns_data[symbol] = returns
-            stock_weights[symbol] = position_value
-            
-            print(f"Processed {symbol}: current_price={current_price}, position_value={position_value}")
+        position_value = current_price * quantity
+        portfolio_value += position_value
+        profit_loss = (current_price - buy_price) * quantity
+        total_profit_loss += profit_loss
 
-        except Exception as e:
-            print(f"Error processing {symbol}: {str(e)}")
-            continue
+        all_returns_data[symbol] = returns
+        current_prices[symbol] = current_price
+        stock_weights[symbol] = position_value
+        
+        logger.debug("Processed %s: current_price=%s, position_value=%s", symbol, current_price, position_value)
 
     # Calculate weights
     for symbol in stock_weights:
@@ -186,44 +245,31 @@ def predict_portfolio_risk(stock_file_mapping, portfolio_stocks, forecast_days=3
         else:
             stock_weights[symbol] = 0
 
+    # First portfolio entry for each normalized symbol
+    stocks_by_symbol = {}
+    for stock in portfolio_stocks:
+        stocks_by_symbol.setdefault(normalize_stock_symbol(stock.get('stockName', '')), stock)
+
+    # Normal quantile and tail factor for the confidence level, shared by every stock
+    z_score = ndtri(1 - confidence_level)
+    cvar_z = stats.norm.pdf(z_score) / (1 - confidence_level)
+
     # Calculate metrics and forecasts
     for symbol in stock_weights.keys():
         # Find the matching stock in portfolio_stocks
-        matching_stock = None
-        for stock in portfolio_stocks:
-            if normalize_stock_symbol(stock.get('stockName', '')) == symbol:
-                matching_stock = stock
-                break
+        matching_stock = stocks_by_symbol.get(symbol)
         
         if not matching_stock or symbol not in all_returns_data:
             continue
 
         # Get the values
-        quantity = int(matching_stock.get('quantity', 0))
-        buy_price = int(matching_stock.get('buyPrice', 0))
+        quantity = float(matching_stock.get('quantity', 0))
+        buy_price = float(matching_stock.get('buyPrice', 0))
         returns = all_returns_data[symbol]
         position_value = stock_weights[symbol] * portfolio_value
         
-        # Get current price from our dataframe
-        current_price = None
-        try:
-            csv_path = stock_file_mapping[symbol]["path"]
-            df = pd.read_csv(csv_path)
-            if 'Close' in df.columns:
-                current_price = pd.to_numeric(df['Close'], errors='coerce').dropna().iloc[-1]
-            else:
-                # Find a suitable price column
-                for col in df.columns:
-                    if 'close' in col.lower() or 'price' in col.lower():
-                        current_price = pd.to_numeric(df[col], errors='coerce').dropna().iloc[-1]
-                        break
-                
-                # If still not found, try the third column
-                if current_price is None and len(df.columns) >= 3:
-                    current_price = pd.to_numeric(df.iloc[:, 2], errors='coerce').dropna().iloc[-1]
-        except Exception as e:
-            print(f"Error getting current price for {symbol}: {str(e)}")
-            current_price = 0
+        # Current price as loaded above, from the CSV or the live fetch
+        current_price = current_prices[symbol]
 
         try:
             # Forecast returns with ARIMA
@@ -238,11 +284,9 @@ def predict_portfolio_risk(stock_file_mapping, portfolio_stocks, forecast_days=3
             forecast_vol = np.sqrt(forecast_result.variance.values[-1, :])
 
             # Calculate risk metrics
-            z_score = stats.norm.ppf(1 - confidence_level)
             var_pct = forecast_returns.mean() + (z_score * forecast_vol.mean())
             var_amount = position_value * (var_pct / 100)
             
-            cvar_z = stats.norm.pdf(z_score) / (1 - confidence_level)
             cvar_pct = forecast_returns.mean() + (forecast_vol.mean() * cvar_z)
             cvar_amount = position_value * (cvar_pct / 100)
             
@@ -250,9 +294,9 @@ def predict_portfolio_risk(stock_file_mapping, portfolio_stocks, forecast_days=3
 
             # Store results with proper JSON serialization
             stock_results[matching_stock.get('stockName', symbol)] = {
-                'quantity': int(quantity),
+                'quantity': _json_number(quantity),
                 'current_price': float(current_price) if current_price is not None else 0,
-                'buy_price': int(buy_price),
+                'buy_price': _json_number(buy_price),
                 'position_value': float(position_value),
                 'weight': float(stock_weights[symbol]),
                 'profit_loss': float((current_price - buy_price) * quantity) if current_price is not None else 0,
@@ -266,7 +310,7 @@ def predict_portfolio_risk(stock_file_mapping, portfolio_stocks, forecast_days=3
             }
 
         except Exception as e:
-            print(f"Error processing forecasts for {symbol}: {str(e)}")
+            logger.error("Error processing forecasts for %s: %s", symbol, e)
             continue
 
     if stock_results:
@@ -275,16 +319,17 @@ def predict_portfolio_risk(stock_file_mapping, portfolio_stocks, forecast_days=3
         if all_returns_data:
             first_symbol = list(all_returns_data.keys())[0]
             reference_index = all_returns_data[first_symbol].index
-            portfolio_returns = pd.Series(0, index=reference_index)
+            symbols = [symbol for symbol in stock_weights if symbol in all_returns_data]
             
-            for symbol, weight in stock_weights.items():
-                if symbol in all_returns_data:
-                    # Align the index of each stock's returns with our reference
-                    aligned_returns = all_returns_data[symbol].reindex(reference_index, fill_value=0)
-                    portfolio_returns += aligned_returns * weight
-
-            portfolio_var = calculate_var(portfolio_returns, portfolio_value, confidence_level * 100)
-            portfolio_cvar = calculate_cvar(portfolio_returns, portfolio_value, confidence_level * 100)
+            # Align every stock's returns with our reference (missing days
+            # count as 0) and weight them in one matrix-vector product
+            aligned_returns = pd.DataFrame({symbol: all_returns_data[symbol] for symbol in symbols})
+            aligned_returns = aligned_returns.reindex(reference_index).fillna(0)
+            weights = np.array([stock_weights[symbol] for symbol in symbols], dtype=np.float64)
+            portfolio_returns = pd.Series(aligned_returns.to_numpy(dtype=np.float64) @ weights,
+                                          index=reference_index)
+
+            portfolio_var, portfolio_cvar = calculate_var_cvar(portfolio_returns, portfolio_value, confidence_level * 100)
             portfolio_sharpe = calculate_sharpe_ratio(portfolio_returns)
             portfolio_max_drawdown = calculate_max_drawdown(portfolio_returns)
 
@@ -1,19 +1,87 @@
 import numpy as np
+from scipy.special import ndtri
 
-def calculate_var(returns, portfolio_value, confidence_level=95):
-    var_threshold = np.percentile(returns, 100 - confidence_level)
-    return round(var_threshold * portfolio_value, 2)
+def _as_float64(values):
+    """C-contiguous float64 view (or copy) of values for NumPy reductions."""
+    return np.ascontiguousarray(values, dtype=np.float64)
 
-def calculate_cvar(returns, portfolio_value, confidence_level=95):
-    var_threshold = np.percentile(returns, 100 - confidence_level)
-    cvar = returns[returns <= var_threshold].mean()
-    return round(cvar * portfolio_value, 2)
+def _partition_percentile(values, q):
+    """np.percentile(values, q) in O(n) via np.partition.
+
+    Uses the same linear interpolation as np.percentile and also returns the
+    partitioned copy, whose lower tail callers can reuse.
+    """
+    virtual_index = q / 100 * (values.size - 1)
+    lower = int(virtual_index)
+    upper = min(lower + 1, values.size - 1)
+    partitioned = np.partition(values, (lower, upper))
+    a, b = partitioned[lower], partitioned[upper]
+    gamma = virtual_index - lower
+    # np.percentile's lerp, which interpolates from the nearer neighbour
+    threshold = b - (b - a) * (1 - gamma) if gamma >= 0.5 else a + (b - a) * gamma
+    return threshold, partitioned
+
+def _mean_std(returns):
+    """Mean and sample standard deviation (ddof=1) of a float64 array.
+
+    The sum of squared deviations is a single dot product instead of
+    np.std's separate subtract, square and sum passes.
+    """
+    mean = returns.mean()
+    deviations = returns - mean
+    return mean, np.sqrt(deviations @ deviations / (returns.size - 1))
+
+def _parametric_var_cvar(returns, portfolio_value, confidence_level):
+    """Normal-distribution VaR and CVaR from the mean and sample std."""
+    tail = 1 - confidence_level / 100
+    z_score = ndtri(tail)
+    mean, std = _mean_std(returns)
+    # Expected value below the VaR threshold of a normal: mean - std * pdf(z) / tail
+    tail_mean = mean - std * np.exp(-0.5 * z_score * z_score) / np.sqrt(2 * np.pi) / tail
+    return round((mean + z_score * std) * portfolio_value, 2), round(tail_mean * portfolio_value, 2)
+
+def calculate_var_cvar(returns, portfolio_value, confidence_level=95, method='historical'):
+    """VaR and CVaR from one partition pass over returns.
+
+    method='parametric' assumes normally distributed returns and is O(n)
+    without a partition; for roughly symmetric returns it stays close to
+    the historical estimate, but it understates fat tails.
+    """
+    returns = _as_float64(returns)
+    if method == 'parametric':
+        return _parametric_var_cvar(returns, portfolio_value, confidence_level)
+    var_threshold, partitioned = _partition_percentile(returns, 100 - confidence_level)
+    cvar = partitioned[partitioned <= var_threshold].mean()
+    return round(var_threshold * portfolio_value, 2), round(cvar * portfolio_value, 2)
+
+def calculate_var(returns, portfolio_value, confidence_level=95, method='historical'):
+    return calculate_var_cvar(returns, portfolio_value, confidence_level, method)[0]
+
+def calculate_cvar(returns, portfolio_value, confidence_level=95, method='historical'):
+    return calculate_var_cvar(returns, portfolio_value, confidence_level, method)[1]
 
 def calculate_sharpe_ratio(returns, risk_free_rate=0.05):
-    excess_returns = returns.mean() - risk_free_rate / 252
-    return round(excess_returns / returns.std(), 2)
+    returns = _as_float64(returns)
+    mean, std = _mean_std(returns)
+    return round((mean - risk_free_rate / 252) / std, 2)
 
 def calculate_max_drawdown(prices):
-    cumulative_max = prices.cummax()
-    drawdown = (prices - cumulative_max) / cumulative_max
-    return round(drawdown.min(), 4)
+    prices = _as_float64(prices)
+    # fmax/nanmin skip missing prices the way Series.cummax/min do
+    cumulative_max = np.fmax.accumulate(prices)
+    # prices may be the caller's array, so only the difference is divided in place
+    drawdown = prices - cumulative_max
+    drawdown /= cumulative_max
+    return round(float(np.nanmin(drawdown)), 4)
+
+def calculate_max_drawdown_from_returns(returns):
+    """Max drawdown of the growth curve of simple returns, as a fraction.
+
+    The curve starts at 1.0 before the first return, so a loss on the
+    first day counts against the initial value.
+    """
+    returns = _as_float64(returns)
+    growth = np.empty(returns.size + 1)
+    growth[0] = 1.0
+    np.cumprod(1 + returns, out=growth[1:])
+    return calculate_max_drawdown(growth)
@@ -4,9 +4,19 @@ This module helps match user-provided stock names to actual stock data files.
 """
 import os
 import re
+import logging
+from bisect import bisect_right
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional, Tuple
 
+from utils.data_loader import cached_folder_scan, read_close_arrays, read_price_csv
+
+logger = logging.getLogger(__name__)
+
+# Everything except the characters kept in normalized stock names
+_NON_NAME_CHARS = re.compile(r'[^a-z0-9.]')
+
 class StockMatcher:
     def __init__(self, stock_data_path: str):
         """
@@ -20,7 +30,8 @@ class StockMatcher:
         self.display_names = {}  # Maps normalized name to display name
         self._load_stock_files()
     
-    def _normalize_stock_name(self, name: str) -> str:
+    @staticmethod
+    def _normalize_stock_name(name: str) -> str:
         """
         Normalize stock name for consistent matching.
         
@@ -40,7 +51,7 @@ class StockMatcher:
         normalized = normalized.replace("&", "and")
         
         # Remove non-alphanumeric characters (except suffix separator)
-        normalized = re.sub(r'[^a-z0-9.]', '', normalized)
+        normalized = _NON_NAME_CHARS.sub('', normalized)
         
         # Create variations with and without .NS suffix
         base_name = normalized.replace(".ns", "")
@@ -54,29 +65,60 @@ class StockMatcher:
         if not os.path.exists(self.stock_data_path):
             raise FileNotFoundError(f"Stock data directory not found: {self.stock_data_path}")
         
-        csv_files = [f for f in os.listdir(self.stock_data_path) if f.endswith("_data.csv")]
+        # Shared across instances until a file is added, removed or renamed
+        self.stock_files, self.display_names = cached_folder_scan(self.stock_data_path, _scan_stock_files)
+        self._build_fuzzy_index()
+    
+    def _build_fuzzy_index(self) -> None:
+        """
+        Index the normalized keys for the fuzzy fallback in get_matching_file.
         
-        print(f"Found {len(csv_files)} stock data files")
+        Keys are joined into one string so a single str.find locates the first
+        key containing a name; the start offsets map a hit back to its key.
+        """
+        self._fuzzy_keys = list(self.stock_files)
+        self._fuzzy_text = "\0".join(self._fuzzy_keys)
+        self._fuzzy_offsets = []
+        self._by_prefix = {}
+        self._short_keys = []
+        offset = 0
+        for index, key in enumerate(self._fuzzy_keys):
+            self._fuzzy_offsets.append(offset)
+            offset += len(key) + 1
+            if len(key) < 3:
+                self._short_keys.append((index, key))
+            else:
+                self._by_prefix.setdefault(key[:3], []).append((index, key))
+    
+    def _fuzzy_match(self, normalized: str) -> Optional[str]:
+        """
+        Find the first key (in load order) that contains normalized or is
+        contained in it.
         
-        for filename in csv_files:
-            # Extract stock symbol from filename (removing _data.csv)
-            stock_symbol = filename[:-9]
-            
-            # Create different variations for matching
-            base_symbol = stock_symbol.replace(".NS", "")
-            
-            # Store both with and without suffix for robust matching
-            normalized_base = self._normalize_stock_name(base_symbol)
-            normalized_full = self._normalize_stock_name(stock_symbol)
-            
-            # Add to mapping dictionaries
-            # Keys: without .ns and with .ns so both forms are recognized
-            self.stock_files[normalized_base] = filename
-            self.stock_files[normalized_full] = filename
+        Args:
+            normalized: Normalized stock name
             
-            # Store display name
-            self.display_names[normalized_base] = stock_symbol
-            self.display_names[normalized_full] = stock_symbol
+        Returns:
+            Matching key, or None if there is none
+        """
+        best = len(self._fuzzy_keys)
+        
+        # Normalized names never contain the separator, so a hit lies inside one key
+        position = self._fuzzy_text.find(normalized)
+        if position != -1:
+            best = bisect_right(self._fuzzy_offsets, position) - 1
+        
+        # A key contained in normalized starts at some position; only keys whose
+        # three-character prefix occurs there need checking
+        for start in range(len(normalized) - 2):
+            for index, key in self._by_prefix.get(normalized[start:start + 3], ()):
+                if index < best and normalized.startswith(key, start):
+                    best = index
+        for index, key in self._short_keys:
+            if index < best and key in normalized:
+                best = index
+        
+        return self._fuzzy_keys[best] if best < len(self._fuzzy_keys) else None
     
     def get_matching_file(self, stock_name: str) -> Tuple[Optional[str], Optional[str]]:
         """
@@ -104,10 +146,10 @@ class StockMatcher:
                 
         # If still no match, try a fuzzy match
         # (This is a simple implementation - you could use more sophisticated fuzzy matching)
-        for key in self.stock_files:
-            if normalized in key or key in normalized:
-                file_path = os.path.join(self.stock_data_path, self.stock_files[key])
-                return file_path, self.display_names[key]
+        key = self._fuzzy_match(normalized)
+        if key is not None:
+            file_path = os.path.join(self.stock_data_path, self.stock_files[key])
+            return file_path, self.display_names[key]
                 
         return None, None
     
@@ -124,27 +166,55 @@ class StockMatcher:
         file_path, display_name = self.get_matching_file(stock_name)
         
         if not file_path:
-            print(f"No matching file found for stock: {stock_name}")
+            logger.warning("No matching file found for stock: %s", stock_name)
             return None, None
         
         try:
             # Read the CSV file
-            df = pd.read_csv(file_path)
+            df = read_price_csv(file_path)
             
             # Clean up data
             df = df.dropna()  # Remove NaN values
             
             # Ensure we have the required columns
             if 'Date' not in df.columns or 'Close' not in df.columns:
-                print(f"Missing required columns in {file_path}")
+                logger.warning("Missing required columns in %s", file_path)
                 return None, None
                 
             return df, display_name
             
-        except Exception as e:
-            print(f"Error reading stock data for {stock_name} from {file_path}: {str(e)}")
+        except Exception:
+            logger.exception("Error reading stock data for %s from %s", stock_name, file_path)
             return None, None
-    
+
+    def get_close_array(self, stock_name: str) -> Tuple[Optional[np.ndarray], Optional[np.ndarray], Optional[str]]:
+        """
+        Get just the dates and closing prices for a given stock name.
+
+        Reads only the Date and Close columns straight into arrays, for
+        callers that only need the price series.
+
+        Args:
+            stock_name: Stock name to get prices for
+
+        Returns:
+            Tuple of (datetime64 dates, float64 closes, display_name) or
+            (None, None, None) if stock not found
+        """
+        file_path, display_name = self.get_matching_file(stock_name)
+
+        if not file_path:
+            logger.warning("No matching file found for stock: %s", stock_name)
+            return None, None, None
+
+        try:
+            dates, close = read_close_arrays(file_path)
+            return dates, close, display_name
+
+        except Exception:
+            logger.exception("Error reading stock data for %s from %s", stock_name, file_path)
+            return None, None, None
+
     def list_available_stocks(self) -> List[str]:
         """
         Get a list of all available stock display names.
@@ -156,6 +226,41 @@ class StockMatcher:
         return sorted(list(set(self.display_names.values())))
 
 
+def _scan_stock_files(folder_path: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Build StockMatcher's mapping dictionaries from the files in folder_path.
+    
+    Returns:
+        Tuple of (normalized name -> filename, normalized name -> display name)
+    """
+    stock_files = {}
+    display_names = {}
+    csv_files = [f for f in os.listdir(folder_path) if f.endswith("_data.csv")]
+    
+    logger.info("Found %d stock data files", len(csv_files))
+    
+    for filename in csv_files:
+        # Extract stock symbol from filename (removing _data.csv)
+        stock_symbol = filename[:-9]
+        
+        # Create different variations for matching
+        base_symbol = stock_symbol.replace(".NS", "")
+        
+        # Store both with and without suffix for robust matching
+        normalized_base = StockMatcher._normalize_stock_name(base_symbol)
+        normalized_full = StockMatcher._normalize_stock_name(stock_symbol)
+        
+        # Add to mapping dictionaries
+        # Keys: without .ns and with .ns so both forms are recognized
+        stock_files[normalized_base] = filename
+        stock_files[normalized_full] = filename
+        
+        # Store display name
+        display_names[normalized_base] = stock_symbol
+        display_names[normalized_full] = stock_symbol
+    
+    return stock_files, display_names
+
 # Usage example
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('statsmodels')
+
+from models import advanced_forecasting
+from models.advanced_forecasting import AdvancedForecaster
+
+
+def _returns(n, seed=0):
+    return pd.Series(np.random.default_rng(seed).normal(0, 1, n))
+
+
+def test_stl_forecast_shape_and_determinism():
+    forecaster = AdvancedForecaster()
+    returns = _returns(200)
+    forecast = forecaster.stl_forecast(returns, forecast_days=7)
+    assert forecast.shape == (7,)
+    assert np.isfinite(forecast).all()
+    np.testing.assert_array_equal(forecast, AdvancedForecaster().stl_forecast(returns, forecast_days=7))
+
+
+def test_stl_forecast_rejects_series_shorter_than_two_cycles():
+    with pytest.raises(ValueError):
+        AdvancedForecaster().stl_forecast(_returns(9), forecast_days=7, period=5)
+    assert AdvancedForecaster().stl_forecast(_returns(10), forecast_days=7, period=5).shape == (7,)
+
+
+@pytest.mark.parametrize('enabled', [False, True])
+def test_ensemble_uses_stl_only_when_opted_in(monkeypatch, enabled):
+    monkeypatch.setattr(advanced_forecasting, 'USE_STL_FORECAST', enabled)
+    monkeypatch.setattr(advanced_forecasting, 'TENSORFLOW_AVAILABLE', False)
+    calls = []
+    monkeypatch.setattr(AdvancedForecaster, 'stl_forecast',
+                        lambda self, returns, forecast_days=30, period=5: calls.append(1) or np.zeros(forecast_days))
+    forecast = AdvancedForecaster().ensemble_forecast(_returns(120), forecast_days=5)
+    assert forecast.shape == (5,)
+    assert bool(calls) is enabled
+
+
+def test_cached_lstm_reforecast_matches_fresh_forecast():
+    pytest.importorskip('tensorflow')
+    if not advanced_forecasting.TENSORFLOW_AVAILABLE:
+        pytest.skip('TensorFlow not available')
+    forecaster = AdvancedForecaster()
+    returns = _returns(100)
+    fresh = forecaster.lstm_forecast(returns, 10, symbol='X')
+    assert forecaster._reusable_fit('X', 'lstm', returns) is not None
+    np.testing.assert_array_equal(forecaster.lstm_forecast(returns, 10, symbol='X'), fresh)
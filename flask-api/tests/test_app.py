@@ -0,0 +1,40 @@
+import pytest
+
+import app as riskos_app
+
+
+@pytest.fixture(scope='module')
+def client():
+    return riskos_app.app.test_client()
+
+
+def test_calculate_risk_keeps_fractional_buy_prices(client):
+    response = client.post('/calculate-risk', json={
+        "portfolio": [{"stockName": "RELIANCE", "quantity": 2, "buyPrice": 123.75}],
+        "confidenceLevel": 95
+    })
+    assert response.status_code == 200
+    # 2 * 123.75, not 2 * 123
+    assert response.get_json()["portfolio_summary"]["Total Portfolio Value (₹)"] == 247.5
+
+
+@pytest.mark.parametrize('stock', [
+    {"stockName": "RELIANCE", "quantity": "ten", "buyPrice": 2000},
+    {"stockName": "RELIANCE", "quantity": 10, "buyPrice": None},
+    {"stockName": "RELIANCE", "quantity": 10},
+])
+def test_calculate_risk_rejects_non_numeric_input(client, stock):
+    response = client.post('/calculate-risk', json={"portfolio": [stock]})
+    assert response.status_code == 400
+    assert "numeric" in response.get_json()["error"]
+
+
+def test_predict_portfolio_keeps_integral_quantities_as_ints(client):
+    response = client.post('/predict-portfolio', json={
+        "portfolio": [{"stockName": "RELIANCE", "quantity": 10, "buyPrice": 2000.5}],
+        "forecastDays": 5
+    })
+    assert response.status_code == 200
+    stock = response.get_json()["individual_stocks"]["RELIANCE"]
+    assert stock["quantity"] == 10 and isinstance(stock["quantity"], int)
+    assert stock["buy_price"] == 2000.5
@@ -0,0 +1,81 @@
+import os
+import time
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+from utils.cache import FileCache, cached
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FileCache(str(tmp_path / 'cache'))
+
+
+def _age_entries(cache, seconds):
+    for name in os.listdir(cache.cache_dir):
+        path = os.path.join(cache.cache_dir, name)
+        mtime = time.time() - seconds
+        os.utime(path, (mtime, mtime))
+
+
+def test_entries_expire_after_ttl(cache):
+    cache.set('price', 101.5)
+    assert cache.get('price', timedelta(minutes=5)) == 101.5
+    _age_entries(cache, 600)
+    assert cache.get('price', timedelta(minutes=5)) is None
+    assert cache.get('price', timedelta(hours=1)) == 101.5
+
+
+def test_series_round_trip(cache):
+    index = pd.DatetimeIndex(['2024-01-01', '2024-01-02'], tz='Asia/Kolkata', name='Date')
+    series = pd.Series([1.0, 2.0], index=index, name='Close')
+    cache.set('history', series)
+    pd.testing.assert_series_equal(cache.get('history', timedelta(days=1)), series)
+
+
+def test_unsupported_values_are_not_stored(cache):
+    cache.set('profile', {'sector': 'Energy'})
+    assert cache.get('profile', timedelta(days=1)) is None
+
+
+def test_cache_directory_is_private(cache):
+    cache.set('price', 1.0)
+    assert os.stat(cache.cache_dir).st_mode & 0o077 == 0
+
+
+def test_cached_skips_none_results(cache):
+    calls = []
+
+    @cached(ttl=timedelta(days=1), cache=cache)
+    def fetch(symbol):
+        calls.append(symbol)
+        return None if len(calls) == 1 else 42.0
+
+    assert fetch('TCS') is None
+    # The failure was not remembered, so this call runs again and is stored
+    assert fetch('TCS') == 42.0
+    assert fetch('TCS') == 42.0
+    assert calls == ['TCS', 'TCS']
+
+
+def test_cached_methods_share_entries_across_instances(cache):
+    class Provider:
+        calls = 0
+
+        @cached(ttl=timedelta(days=1), cache=cache)
+        def get_current_price(self, symbol):
+            Provider.calls += 1
+            return 10.0
+
+    assert Provider().get_current_price('TCS') == Provider().get_current_price('TCS') == 10.0
+    assert Provider.calls == 1
+
+
+@pytest.mark.skipif(not hasattr(os, 'geteuid') or os.geteuid() != 0, reason='needs root to chown')
+def test_entries_owned_by_another_user_are_ignored(cache):
+    cache.set('price', 1.0)
+    for name in os.listdir(cache.cache_dir):
+        os.chown(os.path.join(cache.cache_dir, name), 65534, 65534)
+    assert cache.get('price', timedelta(days=1)) is None
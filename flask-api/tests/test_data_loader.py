@@ -0,0 +1,22 @@
+import pandas as pd
+import pytest
+
+from utils.data_loader import read_price_csv
+
+CSV = "Date,Stock,Close\n,,INFY.NS\n2015-01-01,INFY.NS,383.11\n2015-01-02,INFY.NS,390.64\n"
+
+
+def test_read_price_csv_matches_c_engine(tmp_path):
+    path = tmp_path / 'INFY.NS_data.csv'
+    path.write_text(CSV)
+    df = read_price_csv(path)
+    pd.testing.assert_frame_equal(df, pd.read_csv(path))
+    assert df['Date'].iloc[1] == '2015-01-01'
+
+
+def test_read_price_csv_parses_requested_dates(tmp_path):
+    path = tmp_path / 'INFY.NS_data.csv'
+    path.write_text(CSV)
+    df = read_price_csv(path, parse_dates=['Date'])
+    assert pd.isna(df['Date'].iloc[0])
+    assert df['Date'].iloc[1] == pd.Timestamp('2015-01-01')
@@ -0,0 +1,253 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+from utils import cache, data_providers
+from utils.cache import FileCache
+from utils.data_providers import (CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS, DataProvider,
+                                  YahooFinanceProvider)
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.content = json.dumps(payload).encode()
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+
+class FakeSession:
+    def __init__(self, *status_codes):
+        self.status_codes = list(status_codes)
+        self.requests = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.requests += 1
+        return FakeResponse(self.status_codes.pop(0))
+
+
+class PayloadSession:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def get(self, url, params=None, timeout=None):
+        return FakeResponse(200, self.payload)
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setattr(data_providers, 'HTTP_BACKOFF_SECONDS', 0)
+    clock = [1000.0]
+    monkeypatch.setattr(data_providers.time, 'monotonic', lambda: clock[0])
+
+    # A fresh subclass gets its own bucket and circuit state
+    class Provider(DataProvider):
+        rate_limit = (1000.0, 100)
+
+    instance = Provider()
+    instance.clock = clock
+    return instance
+
+
+def test_transient_errors_are_retried(provider):
+    provider.session = FakeSession(503, 200)
+    assert provider._get('https://example.invalid', {}).status_code == 200
+    assert provider.session.requests == 2
+    assert type(provider)._failure_count == 0
+
+
+def test_client_errors_are_not_retried(provider):
+    provider.session = FakeSession(404)
+    with pytest.raises(requests.HTTPError):
+        provider._get('https://example.invalid', {})
+    assert provider.session.requests == 1
+    assert type(provider)._failure_count == 0
+
+
+def test_client_errors_do_not_open_the_circuit(provider):
+    # Unknown symbols answer 404; they must not lock out valid ones
+    provider.session = FakeSession(*[404] * CIRCUIT_FAILURE_THRESHOLD, 200)
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(requests.HTTPError):
+            provider._get('https://example.invalid', {})
+    assert type(provider)._circuit_opened_at is None
+    assert provider._get('https://example.invalid', {}).status_code == 200
+
+
+def test_circuit_opens_after_threshold_and_closes_after_probe(provider):
+    cls = type(provider)
+    # Each retry counts toward the threshold, so one call can open the circuit
+    provider.session = FakeSession(*[503] * 10)
+    with pytest.raises(RuntimeError, match='circuit open'):
+        provider._get('https://example.invalid', {})
+    assert provider.session.requests == CIRCUIT_FAILURE_THRESHOLD
+    assert cls._circuit_opened_at is not None
+
+    # While open, no request goes out
+    provider.session = FakeSession(200)
+    with pytest.raises(RuntimeError, match='circuit open'):
+        provider._get('https://example.invalid', {})
+    assert provider.session.requests == 0
+
+    # After the reset window one probe is let through; success closes the circuit
+    provider.clock[0] += CIRCUIT_RESET_SECONDS
+    assert provider._get('https://example.invalid', {}).status_code == 200
+    assert cls._circuit_opened_at is None and cls._failure_count == 0
+
+
+def test_failed_probe_reopens_circuit(provider):
+    cls = type(provider)
+    provider.session = FakeSession(*[503] * 10)
+    with pytest.raises(RuntimeError):
+        provider._get('https://example.invalid', {})
+
+    provider.clock[0] += CIRCUIT_RESET_SECONDS
+    provider.session = FakeSession(503, 200)
+    with pytest.raises(RuntimeError, match='circuit open'):
+        provider._get('https://example.invalid', {})
+    assert provider.session.requests == 1
+    assert cls._circuit_opened_at is not None
+
+
+@pytest.fixture
+def disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'file_cache', FileCache(str(tmp_path)))
+
+
+def history(*closes):
+    # Like yf.download: exchange-local dates without a freq
+    index = pd.DatetimeIndex(pd.date_range('2024-01-01', periods=len(closes), tz='Asia/Kolkata'), freq=None)
+    return pd.DataFrame({'Open': closes, 'Close': closes}, index=index)
+
+
+def stub_download(monkeypatch, df):
+    calls = []
+
+    def download(tickers, **kwargs):
+        calls.append(list(tickers))
+        return df
+    monkeypatch.setattr(data_providers.yf, 'download', download)
+    return calls
+
+
+def test_batch_splits_multiindex_columns(disk_cache, monkeypatch):
+    df = pd.concat({'AAA.NS': history(1.0, 2.0), 'BBB.NS': history(3.0, 4.0)}, axis=1)
+    stub_download(monkeypatch, df)
+    result = YahooFinanceProvider().fetch_data_batch(['aaa', 'BBB.NS'], '1y')
+    assert list(result) == ['aaa', 'BBB.NS']
+    assert result['aaa'].tolist() == [1.0, 2.0]
+    assert result['BBB.NS'].tolist() == [3.0, 4.0]
+    assert result['aaa'].name == 'Close'
+
+
+def test_batch_reads_flat_columns_as_the_single_ticker(disk_cache, monkeypatch):
+    stub_download(monkeypatch, history(5.0, 6.0))
+    result = YahooFinanceProvider().fetch_data_batch(['aaa'], '1y')
+    assert result['aaa'].tolist() == [5.0, 6.0]
+
+
+def test_batch_leaves_out_all_nan_tickers(disk_cache, monkeypatch):
+    df = pd.concat({'AAA.NS': history(1.0, 2.0), 'BAD.NS': history(np.nan, np.nan)}, axis=1)
+    stub_download(monkeypatch, df)
+    result = YahooFinanceProvider().fetch_data_batch(['AAA', 'BAD'], '1y')
+    assert list(result) == ['AAA']
+    assert data_providers._yahoo_fetch_cached.cache_lookup('BAD.NS', '1y') is None
+
+
+def test_batch_downloads_are_read_back_by_fetch_data(disk_cache, monkeypatch):
+    calls = stub_download(monkeypatch, history(7.0, 8.0))
+    provider = YahooFinanceProvider()
+    downloaded = provider.fetch_data_batch(['aaa'], '1y')['aaa']
+
+    def no_ticker(sym):
+        raise AssertionError('fetch_data should be served from the cache')
+    monkeypatch.setattr(data_providers.yf, 'Ticker', no_ticker)
+    pd.testing.assert_series_equal(provider.fetch_data('AAA.NS', '1y'), downloaded)
+
+    # A second batch finds the entry and downloads nothing
+    assert provider.fetch_data_batch(['AAA'], '1y')['AAA'].tolist() == [7.0, 8.0]
+    assert calls == [['AAA.NS']]
+
+
+class StaticProvider(DataProvider):
+    def __init__(self, series_by_symbol):
+        super().__init__()
+        self.series_by_symbol = series_by_symbol
+        self.requested = []
+
+    def fetch_data(self, symbol, period="5y"):
+        self.requested.append(symbol)
+        return self.series_by_symbol.get(symbol)
+
+
+def fetcher_with(*providers):
+    fetcher = object.__new__(data_providers.MultiProviderDataFetcher)
+    fetcher.providers = list(providers)
+    return fetcher
+
+
+def test_fetch_many_keys_results_by_symbol():
+    a, b = pd.Series([1.0]), pd.Series([2.0])
+    provider = StaticProvider({'A': a, 'B': b})
+    result = fetcher_with(provider).fetch_many(['A', 'B', 'A', 'C'], '1y')
+    assert list(result) == ['A', 'B', 'C']
+    assert result['A'] is a and result['B'] is b and result['C'] is None
+    # Duplicates are fetched once
+    assert sorted(provider.requested) == ['A', 'B', 'C']
+
+
+def test_fetch_many_sends_only_batch_misses_down_the_provider_chain(disk_cache, monkeypatch):
+    stub_download(monkeypatch, pd.concat({'AAA.NS': history(1.0), 'BBB.NS': history(np.nan)}, axis=1))
+
+    def empty_ticker(sym):
+        ticker = type('Ticker', (), {})()
+        ticker.history = lambda **kwargs: pd.DataFrame()
+        return ticker
+    monkeypatch.setattr(data_providers.yf, 'Ticker', empty_ticker)
+
+    fallback = StaticProvider({'BBB': pd.Series([9.0])})
+    result = fetcher_with(YahooFinanceProvider(), fallback).fetch_many(['AAA', 'BBB'], '1y')
+    assert result['AAA'].tolist() == [1.0]
+    assert result['BBB'].tolist() == [9.0]
+    assert fallback.requested == ['BBB']
+
+
+def test_alpha_vantage_close_series_matches_frame_parsing(disk_cache):
+    # Out of order, with a close that does not parse
+    time_series = {
+        '2024-01-03': {'1. open': '12.0', '4. close': '12.5', '5. volume': '300'},
+        '2024-01-01': {'1. open': '10.0', '4. close': '10.5', '5. volume': '100'},
+        '2024-01-02': {'1. open': '11.0', '4. close': 'n/a', '5. volume': '200'},
+    }
+    provider = data_providers.AlphaVantageProvider(api_key='test')
+    provider.session = PayloadSession({'Time Series (Daily)': time_series})
+
+    df = pd.DataFrame.from_dict(time_series, orient='index')
+    df.index = pd.to_datetime(df.index)
+    expected = pd.to_numeric(df.sort_index()['4. close'], errors='coerce').dropna()
+    pd.testing.assert_series_equal(provider.fetch_data('TEST.NS', '1y'), expected)
+
+
+def test_tiingo_close_series_matches_frame_parsing(disk_cache):
+    # Out of order, with a missing close
+    rows = [
+        {'date': '2024-01-03T00:00:00.000Z', 'open': 12.0, 'close': 12.5, 'volume': 300},
+        {'date': '2024-01-01T00:00:00.000Z', 'open': 10.0, 'close': 10.5, 'volume': 100},
+        {'date': '2024-01-02T00:00:00.000Z', 'open': 11.0, 'close': None, 'volume': 200},
+    ]
+    provider = data_providers.TiingoProvider(api_key='test')
+    provider.session = PayloadSession(rows)
+
+    df = pd.DataFrame(rows)
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.set_index('date').sort_index()
+    expected = pd.to_numeric(df['close'], errors='coerce').dropna()
+    pd.testing.assert_series_equal(provider.fetch_data('TEST.NS', '1y'), expected)
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from models.risk_metrics import (
+    _partition_percentile,
+    calculate_max_drawdown,
+    calculate_max_drawdown_from_returns
+)
+
+
+def test_max_drawdown_from_returns_counts_first_day_loss():
+    # A portfolio that only falls from the start: the first day's loss is
+    # measured against the initial value of 1.0
+    assert calculate_max_drawdown_from_returns([-0.1, 0.05]) == pytest.approx(-0.1)
+    assert calculate_max_drawdown_from_returns([-0.1, -0.1]) == pytest.approx(-0.19)
+
+
+def test_max_drawdown_from_returns_matches_prices():
+    returns = np.random.default_rng(0).normal(0, 0.02, 500)
+    prices = np.concatenate(([1.0], np.cumprod(1 + returns)))
+    assert calculate_max_drawdown_from_returns(returns) == calculate_max_drawdown(prices)
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 10, 251, 1000])
+@pytest.mark.parametrize('q', [0, 1, 5, 10, 50, 90, 99, 100])
+def test_partition_percentile_matches_numpy(size, q):
+    values = np.random.default_rng(size).normal(0, 0.02, size)
+    threshold, partitioned = _partition_percentile(values, q)
+    assert threshold == np.percentile(values, q)
+    assert np.array_equal(np.sort(partitioned), np.sort(values))
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+from models.stock_matcher import StockMatcher
+
+
+def _linear_fuzzy_match(matcher, normalized):
+    """The original first-match loop that _fuzzy_match replaces"""
+    for key in matcher.stock_files:
+        if normalized in key or key in normalized:
+            return key
+    return None
+
+
+@pytest.fixture
+def matcher(tmp_path):
+    rng = random.Random(0)
+    alphabet = 'abc12.'
+    names = {''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 7))) for _ in range(300)}
+    names |= {'RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'M&M.NS'}
+    for name in names:
+        (tmp_path / f'{name}_data.csv').write_text('Date,Close\n')
+    return StockMatcher(str(tmp_path))
+
+
+def test_fuzzy_match_equals_linear_scan(matcher):
+    rng = random.Random(1)
+    queries = [''.join(rng.choice('abc12.') for _ in range(rng.randint(1, 10))) for _ in range(5000)]
+    queries += ['reliance', 'relian', 'tcsltd', 'hdfc', 'mandm', 'zzz', 'ab']
+    for query in queries:
+        normalized = matcher._normalize_stock_name(query)
+        assert matcher._fuzzy_match(normalized) == _linear_fuzzy_match(matcher, normalized), query
+
+
+def test_get_matching_file_resolves_suffix_and_fuzzy(tmp_path):
+    for name in ('RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'M&M.NS'):
+        (tmp_path / f'{name}_data.csv').write_text('Date,Close\n')
+    matcher = StockMatcher(str(tmp_path))
+    assert matcher.get_matching_file('Reliance')[1] == 'RELIANCE.NS'
+    assert matcher.get_matching_file('tcs.ns')[1] == 'TCS.NS'
+    assert matcher.get_matching_file('HDFC')[1] == 'HDFCBANK.NS'
+    assert matcher.get_matching_file('M & M')[1] == 'M&M.NS'
+    assert matcher.get_matching_file('nothing like it xyz') == (None, None)
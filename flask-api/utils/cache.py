@@ -0,0 +1,160 @@
+"""
+On-disk TTL cache for data provider responses
+Entries survive restarts and are shared by every worker on the host
+"""
+
+import os
+import json
+import stat
+import hashlib
+import inspect
+import logging
+import tempfile
+import time
+from datetime import timedelta
+from functools import wraps
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Series entries are stored as parquet
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Per-user by default: a shared directory would let another local user plant entries
+CACHE_DIR = os.getenv('RISKOS_CACHE_DIR') or os.path.join(
+    os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'riskos')
+
+# Column name for a Series that had no name of its own
+_UNNAMED = '__series__'
+
+def _owned_by_current_user(st: os.stat_result) -> bool:
+    """True if st belongs to the current user (always true where uids don't exist)"""
+    return not hasattr(os, 'getuid') or st.st_uid == os.getuid()
+
+class FileCache:
+    """Values stored one file per key; a file's mtime is its write time
+
+    Only data that parses safely is stored: a pandas Series as parquet and a
+    number as JSON. Other values are not cached. The directory is created
+    private to the current user, and files owned by anyone else are ignored.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest() + suffix)
+
+    def _ensure_dir(self) -> bool:
+        """Create the cache directory if needed; False if it is not safe to use"""
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        st = os.stat(self.cache_dir)
+        if not _owned_by_current_user(st):
+            logger.warning(f"Not using cache directory {self.cache_dir}: owned by another user")
+            return False
+        if hasattr(os, 'getuid') and st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            logger.warning(f"Not using cache directory {self.cache_dir}: writable by other users")
+            return False
+        return True
+
+    def get(self, key: str, ttl: timedelta) -> Optional[Any]:
+        """Return the value stored for key if it is younger than ttl, else None"""
+        for suffix in ('.parquet', '.json'):
+            path = self._path(key, suffix)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            try:
+                if not _owned_by_current_user(st):
+                    logger.warning(f"Ignoring cache entry {path}: owned by another user")
+                    return None
+                if time.time() - st.st_mtime > ttl.total_seconds():
+                    return None
+                if suffix == '.json':
+                    with open(path, 'rb') as f:
+                        return json.load(f)['value']
+                series = pd.read_parquet(path).iloc[:, 0]
+                if series.name == _UNNAMED:
+                    series.name = None
+                return series
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+                return None
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value for key, replacing any previous entry atomically"""
+        if isinstance(value, pd.Series):
+            if not PYARROW_AVAILABLE:
+                return
+            suffix = '.parquet'
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            suffix = '.json'
+        else:
+            logger.debug(f"Not caching {type(value).__name__} value for {key}")
+            return
+        try:
+            if not self._ensure_dir():
+                return
+            # Write to a temporary file first so concurrent readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                if suffix == '.json':
+                    with os.fdopen(fd, 'w') as f:
+                        json.dump({'value': value}, f)
+                else:
+                    os.close(fd)
+                    name = value.name if isinstance(value.name, str) else _UNNAMED
+                    value.to_frame(name).to_parquet(tmp_path)
+                os.replace(tmp_path, self._path(key, suffix))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            logger.warning(f"Could not write cache entry for {key}: {e}")
+
+file_cache = FileCache()
+
+def cached(ttl: timedelta, cache: Optional[FileCache] = None) -> Callable:
+    """Cache a function's or provider method's non-None results on disk for ttl.
+
+    The key is the qualified function name and call arguments (without
+    self for methods), so providers never share entries. The wrapper's
+    cache_lookup(*args) and cache_store(value, *args) read and write the
+    entry a call with those arguments would use, for callers that fetch
+    several values at once.
+    """
+    def decorator(func: Callable) -> Callable:
+        parameters = list(inspect.signature(func).parameters)
+        skip = 1 if parameters[:1] == ['self'] else 0
+
+        def key(args, kwargs) -> str:
+            return f"{func.__module__}.{func.__qualname__}:{args[skip:]!r}:{sorted(kwargs.items())!r}"
+
+        def cache_lookup(*args, **kwargs) -> Optional[Any]:
+            return (cache or file_cache).get(key(args, kwargs), ttl)
+
+        def cache_store(value: Any, *args, **kwargs) -> None:
+            if value is not None:
+                (cache or file_cache).set(key(args, kwargs), value)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            value = cache_lookup(*args, **kwargs)
+            if value is not None:
+                return value
+            value = func(*args, **kwargs)
+            # Failures return None; don't remember them so the next call retries
+            cache_store(value, *args, **kwargs)
+            return value
+        wrapper.cache_lookup = cache_lookup
+        wrapper.cache_store = cache_store
+        return wrapper
+    return decorator
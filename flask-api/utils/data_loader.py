@@ -1,30 +1,150 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 
-def get_csv_file_mapping(folder_path):
+# pyarrow's CSV reader is multithreaded and much faster than the default C
+# engine for these numeric price files; fall back when it is not installed
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+class MissingColumnsError(ValueError):
+    """A price CSV lacks the Date or Close column."""
+
+def read_price_csv(file_path, **kwargs):
+    """Read a stock price CSV, preferring the pyarrow engine when available."""
+    if PYARROW_AVAILABLE:
+        arrow_kwargs = dict(kwargs)
+        parse_dates = arrow_kwargs.pop('parse_dates', None) or []
+        if 'Date' not in parse_dates:
+            # pyarrow would infer datetime.date values where the C engine
+            # keeps the text, so read an unrequested Date as strings
+            arrow_kwargs['dtype'] = {'Date': 'string', **(arrow_kwargs.get('dtype') or {})}
+        try:
+            df = pd.read_csv(file_path, engine='pyarrow', **arrow_kwargs)
+            if 'Date' not in parse_dates and 'Date' in df.columns:
+                df['Date'] = df['Date'].astype(object).where(df['Date'].notna(), np.nan)
+            # The header-like second row stops pyarrow inferring dates, so
+            # convert them here the same way the C engine would
+            for col in parse_dates:
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+            return df
+        except Exception:
+            # Options or file contents pyarrow can't handle; use the C engine
+            pass
+    return pd.read_csv(file_path, **kwargs)
+
+def read_close_arrays(file_path):
+    """Read (datetime64 dates, float64 closes) from a price CSV without a DataFrame.
+
+    Rows whose Date or Close does not parse (blank or header-like rows) are
+    dropped. Raises MissingColumnsError if either column is absent.
+    """
+    if PYARROW_AVAILABLE:
+        try:
+            table = pacsv.read_csv(file_path, convert_options=pacsv.ConvertOptions(
+                include_columns=['Date', 'Close'],
+                column_types={'Date': pa.string(), 'Close': pa.string()}))
+            dates = pc.strptime(table['Date'], format='%Y-%m-%d', unit='s', error_is_null=True)
+            valid = pc.is_valid(dates)
+            # Every Date unparsed means a different date format; let pandas infer it
+            if pc.any(valid).as_py():
+                table = pa.table({'Date': dates, 'Close': table['Close']}).filter(valid)
+                close = pc.cast(table['Close'], pa.float64()).to_numpy(zero_copy_only=False)
+                dates = table['Date'].to_numpy().astype('datetime64[ns]')
+                keep = ~np.isnan(close)
+                return dates[keep], close[keep]
+        except (pa.ArrowInvalid, pa.ArrowTypeError, KeyError):
+            # Missing columns or prices that are not plain numbers; use pandas
+            pass
+    df = pd.read_csv(file_path, usecols=lambda col: col in ('Date', 'Close'))
+    missing = {'Date', 'Close'}.difference(df.columns)
+    if missing:
+        raise MissingColumnsError(f"{file_path} has no {' or '.join(sorted(missing))} column")
+    dates = pd.to_datetime(df['Date'], errors='coerce').to_numpy()
+    close = pd.to_numeric(df['Close'], errors='coerce').to_numpy(dtype=np.float64)
+    keep = ~(np.isnat(dates) | np.isnan(close))
+    return dates[keep], close[keep]
+
+# Results of cached_folder_scan keyed by (folder, build): (folder mtime, value)
+_folder_scan_cache = {}
+
+def cached_folder_scan(folder_path, build):
+    """build(folder_path), reused until the folder's mtime changes.
+
+    Adding, removing or renaming a file bumps the folder's mtime, so
+    anything derived from its file names stays valid until then. build
+    must be a module-level function (it is part of the key), and callers
+    must not modify the returned value.
+    """
+    folder_mtime = os.stat(folder_path).st_mtime_ns
+    key = (folder_path, build)
+    cached = _folder_scan_cache.get(key)
+    if cached is not None and cached[0] == folder_mtime:
+        return cached[1]
+    value = build(folder_path)
+    _folder_scan_cache[key] = (folder_mtime, value)
+    return value
+
+def _scan_csv_mapping(folder_path):
     mapping = {}
-    for filename in os.listdir(folder_path):
-        if filename.endswith('.csv'):
-            full_path = os.path.join(folder_path, filename)
-            stock_name = filename.split('_')[0].replace('.NS', '').lower()  # 'hdfcbank'
-            full_stock_name = filename.split('_')[0]  # 'HDFCBANK.NS'
-            mapping[stock_name] = {
-                "file_path": full_path,
-                "full_name": full_stock_name
-            }
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.name.endswith('.csv') and entry.is_file():
+                full_stock_name = entry.name.split('_')[0]  # 'HDFCBANK.NS'
+                stock_name = full_stock_name.replace('.NS', '').lower()  # 'hdfcbank'
+                mapping[stock_name] = {
+                    "file_path": entry.path,
+                    "full_name": full_stock_name
+                }
     return mapping
 
+def get_csv_file_mapping(folder_path):
+    return cached_folder_scan(folder_path, _scan_csv_mapping)
+
+def _load_close_column(full_path):
+    """Close prices of one CSV, or None if it has no Close column."""
+    try:
+        # Only Date and Close are used; read them straight into typed arrays
+        dates, close = read_close_arrays(full_path)
+        return pd.Series(close, index=pd.DatetimeIndex(dates, name='Date'), name='Close')
+    except MissingColumnsError:
+        # No Date column; read everything as before
+        stock_df = read_price_csv(full_path)
+    if 'Close' not in stock_df.columns:
+        return None
+    stock_df['Close'] = pd.to_numeric(stock_df['Close'], errors='coerce')
+    stock_df.dropna(subset=['Close'], inplace=True)
+    return stock_df['Close']
+
+# Combined price frames keyed by path: (newest CSV mtime, file count, frame)
+_stock_data_cache = {}
+
 def load_stock_data(folder_path):
-    all_data = {}
-    for filename in os.listdir(folder_path):
-        if filename.endswith('.csv'):
-            full_path = os.path.join(folder_path, filename)
-            stock_df = pd.read_csv(full_path)
-            stock_df['Close'] = pd.to_numeric(stock_df['Close'], errors='coerce')
-            stock_df.dropna(subset=['Close'], inplace=True)
-            stock_name = filename.split('_')[0]  # 'HDFCBANK.NS'
-            if 'Date' in stock_df.columns:
-                stock_df['Date'] = pd.to_datetime(stock_df['Date'], errors='coerce')
-                stock_df.set_index('Date', inplace=True)
-            all_data[stock_name] = stock_df['Close']
-    return pd.DataFrame(all_data)
+    """Close prices of every CSV in folder_path, one column per stock.
+
+    Reused until a CSV is added, removed or modified; callers must not
+    modify the returned frame.
+    """
+    with os.scandir(folder_path) as entries:
+        csv_entries = [entry for entry in entries if entry.name.endswith('.csv') and entry.is_file()]
+    newest_mtime = max((entry.stat().st_mtime_ns for entry in csv_entries), default=0)
+    cached = _stock_data_cache.get(folder_path)
+    if cached is not None and cached[:2] == (newest_mtime, len(csv_entries)):
+        return cached[2]
+
+    # Files are parsed independently and pyarrow releases the GIL while
+    # parsing, so overlap them on a thread pool; map keeps the listing order
+    max_workers = min(8, len(csv_entries)) or 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        closes = executor.map(_load_close_column, [entry.path for entry in csv_entries])
+        all_data = {entry.name.split('_')[0]: close  # 'HDFCBANK.NS'
+                    for entry, close in zip(csv_entries, closes) if close is not None}
+    stock_data = pd.DataFrame(all_data)
+    _stock_data_cache[folder_path] = (newest_mtime, len(csv_entries), stock_data)
+    return stock_data
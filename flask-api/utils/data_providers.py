@@ -5,14 +5,20 @@ Supports Yahoo Finance, Alpha Vantage, and Tiingo APIs
 
 import os
 import time
+import atexit
+import threading
 import requests
 import pandas as pd
-from functools import lru_cache
-from typing import Optional, Dict, Any
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional, Dict, Any, List, Tuple
 import logging
 
+from utils.cache import cached
+
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'WARNING'))
 logger = logging.getLogger(__name__)
 
 # Try to import yfinance
@@ -23,12 +29,181 @@ except ImportError:
     YFINANCE_AVAILABLE = False
     logger.warning("yfinance not available")
 
+# orjson decodes the multi-year JSON payloads several times faster than
+# the stdlib decoder behind response.json()
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# How long on-disk provider responses stay fresh: daily history changes at
+# most once per trading day, quotes go stale quickly
+HISTORY_CACHE_TTL = timedelta(days=1)
+PRICE_CACHE_TTL = timedelta(minutes=5)
+
+# HTTP resilience for the REST providers: transient errors are retried with
+# backoff, and a provider that keeps failing is skipped for a while
+HTTP_TIMEOUT = 30
+HTTP_RETRIES = 3
+HTTP_BACKOFF_SECONDS = 0.5
+HTTP_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_RESET_SECONDS = 60
+
+# Provider symbol formats, memoized per (symbol, style): 'nse' is Yahoo's
+# RELIANCE.NS form, 'bare' drops the suffix for Alpha Vantage and Tiingo
+_SYMBOL_CACHE: Dict[Tuple[str, str], str] = {}
+_SYMBOL_CACHE_MAX = 4096
+
+def normalize_symbol(symbol: str, style: str) -> str:
+    """Symbol in the format a provider expects ('nse' or 'bare')"""
+    key = (symbol, style)
+    normalized = _SYMBOL_CACHE.get(key)
+    if normalized is None:
+        if style == 'nse':
+            if not symbol:
+                normalized = ""
+            else:
+                s = str(symbol).strip().upper()
+                normalized = s if s.endswith(".NS") else f"{s}.NS"
+        elif style == 'bare':
+            normalized = symbol.replace('.NS', '')
+        else:
+            raise ValueError(f"Unknown symbol style: {style}")
+        # Symbols come from user input; bound the memo rather than evict per entry
+        if len(_SYMBOL_CACHE) >= _SYMBOL_CACHE_MAX:
+            _SYMBOL_CACHE.clear()
+        _SYMBOL_CACHE[key] = normalized
+    return normalized
+
+def _parse_json(response: requests.Response) -> Any:
+    """Decode a JSON response body, with orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response.content)
+    return response.json()
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second, holding at most burst"""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            # Waiting under the lock queues other callers behind this one
+            wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            self.tokens = 0.0
+            self.updated_at = now + wait
+
 class DataProvider:
     """Base class for data providers"""
     
+    # Requests per second and burst size for the provider's token bucket
+    rate_limit = (10.0, 5)
+    
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key
-        self.rate_limit_delay = 0.1  # 100ms between requests
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # The bucket is per provider class, shared by every instance and thread
+        cls._bucket = TokenBucket(*cls.rate_limit)
+        # Circuit breaker state, also per provider class
+        cls._circuit_lock = threading.Lock()
+        cls._failure_count = 0
+        cls._circuit_opened_at = None
+        # HTTP session, created on first use and also shared per class
+        cls._session_lock = threading.Lock()
+        cls._session = None
+    
+    def _throttle(self) -> None:
+        """Wait for this provider's rate limit to allow another request"""
+        self._bucket.acquire()
+    
+    @classmethod
+    def _shared_session(cls) -> requests.Session:
+        """Per-class session that reuses connections
+        
+        Every instance and thread of the provider shares its connection pool,
+        so keep-alive connections (and their TLS handshakes) are reused. The
+        session itself never retries; _get does, so that each attempt is
+        rate limited and seen by the circuit breaker.
+        """
+        with cls._session_lock:
+            if cls._session is None:
+                session = requests.Session()
+                # Room for one connection per fetch_many worker
+                session.mount("https://", HTTPAdapter(pool_maxsize=8))
+                atexit.register(session.close)
+                cls._session = session
+            return cls._session
+    
+    @classmethod
+    def _check_circuit(cls) -> None:
+        """Raise if the circuit is open; after CIRCUIT_RESET_SECONDS let one probe through"""
+        with cls._circuit_lock:
+            if cls._circuit_opened_at is not None:
+                if time.monotonic() - cls._circuit_opened_at < CIRCUIT_RESET_SECONDS:
+                    raise RuntimeError(f"{cls.__name__} circuit open after repeated failures")
+                # Let one request through to probe whether the provider recovered
+                cls._circuit_opened_at = None
+    
+    @classmethod
+    def _record_failure(cls) -> None:
+        """Count a failed attempt, opening the circuit after CIRCUIT_FAILURE_THRESHOLD in a row"""
+        with cls._circuit_lock:
+            cls._failure_count += 1
+            if cls._failure_count >= CIRCUIT_FAILURE_THRESHOLD:
+                cls._circuit_opened_at = time.monotonic()
+                logger.warning(f"{cls.__name__} failed {cls._failure_count} times in a row; "
+                               f"skipping it for {CIRCUIT_RESET_SECONDS}s")
+    
+    @classmethod
+    def _record_success(cls) -> None:
+        """Reset the consecutive-failure count after a successful attempt"""
+        with cls._circuit_lock:
+            cls._failure_count = 0
+    
+    def _get(self, url: str, params: Dict[str, Any]) -> requests.Response:
+        """Rate-limited GET through the provider's session, guarded by its circuit breaker
+        
+        Connection errors and HTTP_RETRY_STATUSES responses are retried up to
+        HTTP_RETRIES times with exponential backoff. Every attempt takes a
+        token from the bucket and those failures count toward the circuit
+        breaker, so retries stop as soon as the circuit opens. Other HTTP
+        errors are raised at once and leave the breaker alone.
+        """
+        for attempt in range(HTTP_RETRIES + 1):
+            self._check_circuit()
+            self._throttle()
+            try:
+                response = self.session.get(url, params=params, timeout=HTTP_TIMEOUT)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                status = e.response.status_code if e.response is not None else None
+                if status is not None and status not in HTTP_RETRY_STATUSES:
+                    # The provider answered (e.g. 404 for an unknown symbol); not an outage
+                    raise
+                self._record_failure()
+                if attempt == HTTP_RETRIES:
+                    raise
+                time.sleep(HTTP_BACKOFF_SECONDS * 2 ** attempt)
+                continue
+            self._record_success()
+            return response
     
     def fetch_data(self, symbol: str, period: str = "5y") -> Optional[pd.Series]:
         """Fetch historical data for a symbol"""
@@ -38,6 +213,31 @@ class DataProvider:
         """Get current price for a symbol"""
         raise NotImplementedError
 
+# Module level rather than on the bound method, so self is not part of the key
+# and every YahooFinanceProvider instance (and worker) shares the disk cache.
+# There is no in-memory layer on top: it would outlive the TTL and remember failures
+@cached(ttl=HISTORY_CACHE_TTL)
+def _yahoo_fetch_cached(sym: str, period: str) -> Optional[pd.Series]:
+    """Fetch historical close prices for an already normalized NSE symbol"""
+    try:
+        YahooFinanceProvider._bucket.acquire()
+        ticker = yf.Ticker(sym)
+        df = ticker.history(period=period, auto_adjust=False)
+        
+        if df.empty:
+            logger.warning(f"No data returned for {sym}")
+            return None
+        
+        # Return close prices as Series
+        series = pd.to_numeric(df['Close'], errors='coerce').dropna()
+        series.index = pd.to_datetime(series.index)
+        logger.info(f"Fetched {len(series)} days of data for {sym}")
+        return series
+        
+    except Exception as e:
+        logger.error(f"Yahoo Finance error for {sym}: {str(e)}")
+        return None
+
 class YahooFinanceProvider(DataProvider):
     """Yahoo Finance data provider"""
     
@@ -48,40 +248,89 @@ class YahooFinanceProvider(DataProvider):
     
     def _ensure_nse_symbol(self, symbol: str) -> str:
         """Ensure symbol has .NS suffix for NSE"""
-        if not symbol:
-            return ""
-        s = str(symbol).strip().upper()
-        return s if s.endswith(".NS") else f"{s}.NS"
+        return normalize_symbol(symbol, 'nse')
     
-    @lru_cache(maxsize=256)
     def fetch_data(self, symbol: str, period: str = "5y") -> Optional[pd.Series]:
         """Fetch historical close prices from Yahoo Finance"""
+        # Normalize first so 'reliance', 'RELIANCE' and 'RELIANCE.NS' share cache entries
+        return _yahoo_fetch_cached(self._ensure_nse_symbol(symbol), period)
+    
+    def fetch_data_batch(self, symbols: List[str], period: str = "5y") -> Dict[str, pd.Series]:
+        """Fetch historical close prices for several symbols in one Yahoo Finance download
+        
+        Tickers already in fetch_data's disk cache are served from it and
+        only the rest are downloaded; downloaded series are written back.
+        Symbols Yahoo returns no data for are left out of the result.
+        """
+        nse_symbols = {symbol: self._ensure_nse_symbol(symbol) for symbol in symbols if symbol}
+        series_by_ticker = {}
+        for sym in dict.fromkeys(nse_symbols.values()):
+            series = _yahoo_fetch_cached.cache_lookup(sym, period)
+            if series is not None:
+                series_by_ticker[sym] = series
+        tickers = [sym for sym in dict.fromkeys(nse_symbols.values()) if sym not in series_by_ticker]
+        
+        if tickers:
+            series_by_ticker.update(self._download_batch(tickers, period))
+        
+        return {symbol: series_by_ticker[sym] for symbol, sym in nse_symbols.items()
+                if sym in series_by_ticker}
+    
+    def _download_batch(self, tickers: List[str], period: str) -> Dict[str, pd.Series]:
+        """Download close prices for NSE tickers in one request and cache each one"""
         try:
-            sym = self._ensure_nse_symbol(symbol)
-            ticker = yf.Ticker(sym)
-            df = ticker.history(period=period, auto_adjust=False)
-            
-            if df.empty:
-                logger.warning(f"No data returned for {sym}")
-                return None
-            
-            # Return close prices as Series
-            series = pd.to_numeric(df['Close'], errors='coerce').dropna()
-            series.index = pd.to_datetime(series.index)
-            logger.info(f"Fetched {len(series)} days of data for {sym}")
-            return series
-            
+            self._throttle()
+            # ignore_tz=False keeps the exchange-local index that Ticker.history returns
+            df = yf.download(tickers, period=period, interval="1d", group_by="ticker",
+                             auto_adjust=False, ignore_tz=False, progress=False, threads=True)
         except Exception as e:
-            logger.error(f"Yahoo Finance error for {symbol}: {str(e)}")
-            return None
+            logger.error(f"Yahoo Finance batch error for {tickers}: {str(e)}")
+            return {}
+        
+        if df is None or df.empty:
+            logger.warning(f"No data returned for {tickers}")
+            return {}
+        
+        if isinstance(df.columns, pd.MultiIndex):
+            frames = {sym: df[sym] for sym in df.columns.get_level_values(0).unique()}
+        else:
+            # Older yfinance returns flat columns for a single ticker
+            frames = {tickers[0]: df}
+        
+        results = {}
+        for sym in tickers:
+            if sym not in frames or 'Close' not in frames[sym]:
+                continue
+            # Tickers missing from the download come back as all-NaN columns
+            series = pd.to_numeric(frames[sym]['Close'], errors='coerce').dropna()
+            if series.empty:
+                continue
+            series.index = pd.to_datetime(series.index)
+            series.name = 'Close'
+            # Same entry fetch_data(sym, period) reads
+            _yahoo_fetch_cached.cache_store(series, sym, period)
+            results[sym] = series
+        
+        logger.info(f"Fetched data for {len(results)} of {len(tickers)} symbols in one Yahoo Finance download")
+        return results
     
+    @cached(ttl=PRICE_CACHE_TTL)
     def get_current_price(self, symbol: str) -> Optional[float]:
         """Get current price from Yahoo Finance"""
         try:
             sym = self._ensure_nse_symbol(symbol)
+            self._throttle()
             ticker = yf.Ticker(sym)
-            info = ticker.info
-            return info.get('currentPrice') or info.get('regularMarketPrice')
+            # fast_info comes from the lightweight chart endpoint; ticker.info
+            # downloads and parses the whole company profile for one number
+            try:
+                price = float(ticker.fast_info['last_price'])
+                if price == price:  # not NaN
+                    return price
+            except Exception:
+                pass
+            hist = ticker.history(period='1d')
+            return float(hist['Close'].iloc[-1]) if not hist.empty else None
         except Exception as e:
             logger.error(f"Error getting current price for {symbol}: {str(e)}")
             return None
@@ -89,12 +338,15 @@ class YahooFinanceProvider(DataProvider):
 class AlphaVantageProvider(DataProvider):
     """Alpha Vantage data provider"""
     
+    rate_limit = (5 / 60, 5)  # Alpha Vantage free tier: 5 calls/minute
+    
     def __init__(self, api_key: Optional[str] = None):
         super().__init__(api_key)
         self.api_key = api_key or os.getenv('ALPHA_VANTAGE_API_KEY')
         self.base_url = "https://www.alphavantage.co/query"
-        self.rate_limit_delay = 12  # Alpha Vantage free tier: 5 calls/minute
+        self.session = self._shared_session()
     
+    @cached(ttl=HISTORY_CACHE_TTL)
     def fetch_data(self, symbol: str, period: str = "5y") -> Optional[pd.Series]:
         """Fetch historical data from Alpha Vantage"""
         if not self.api_key:
@@ -103,7 +355,7 @@ class AlphaVantageProvider(DataProvider):
         
         try:
             # Remove .NS suffix for Alpha Vantage
-            clean_symbol = symbol.replace('.NS', '')
+            clean_symbol = normalize_symbol(symbol, 'bare')
             
             params = {
                 'function': 'TIME_SERIES_DAILY',
@@ -112,9 +364,8 @@ class AlphaVantageProvider(DataProvider):
                 'apikey': self.api_key
             }
             
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            response = self._get(self.base_url, params)
+            data = _parse_json(response)
             
             if 'Error Message' in data:
                 logger.error(f"Alpha Vantage error: {data['Error Message']}")
@@ -129,13 +380,10 @@ class AlphaVantageProvider(DataProvider):
                 logger.warning(f"No time series data for {symbol}")
                 return None
             
-            # Convert to DataFrame
-            df = pd.DataFrame.from_dict(time_series, orient='index')
-            df.index = pd.to_datetime(df.index)
-            df = df.sort_index()
-            
-            # Get close prices
-            close_prices = pd.to_numeric(df['4. close'], errors='coerce').dropna()
+            # Only the close is used, so skip building a frame of all five fields
+            close_prices = pd.Series([row.get('4. close') for row in time_series.values()],
+                                     index=pd.to_datetime(list(time_series)), name='4. close')
+            close_prices = pd.to_numeric(close_prices.sort_index(), errors='coerce').dropna()
             
             # Filter to requested period
             if period == "5y":
@@ -148,22 +396,22 @@ class AlphaVantageProvider(DataProvider):
             logger.error(f"Alpha Vantage error for {symbol}: {str(e)}")
             return None
     
+    @cached(ttl=PRICE_CACHE_TTL)
     def get_current_price(self, symbol: str) -> Optional[float]:
         """Get current price from Alpha Vantage"""
         if not self.api_key:
             return None
         
         try:
-            clean_symbol = symbol.replace('.NS', '')
+            clean_symbol = normalize_symbol(symbol, 'bare')
             params = {
                 'function': 'GLOBAL_QUOTE',
                 'symbol': clean_symbol,
                 'apikey': self.api_key
             }
             
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            response = self._get(self.base_url, params)
+            data = _parse_json(response)
             
             quote = data.get('Global Quote', {})
             price = quote.get('05. price')
@@ -176,12 +424,15 @@ class AlphaVantageProvider(DataProvider):
 class TiingoProvider(DataProvider):
     """Tiingo data provider"""
     
+    rate_limit = (2.0, 5)  # Tiingo allows more requests
+    
     def __init__(self, api_key: Optional[str] = None):
         super().__init__(api_key)
         self.api_key = api_key or os.getenv('TIINGO_API_KEY')
         self.base_url = "https://api.tiingo.com/tiingo"
-        self.rate_limit_delay = 0.5  # Tiingo allows more requests
+        self.session = self._shared_session()
     
+    @cached(ttl=HISTORY_CACHE_TTL)
     def fetch_data(self, symbol: str, period: str = "5y") -> Optional[pd.Series]:
         """Fetch historical data from Tiingo"""
         if not self.api_key:
@@ -190,7 +441,7 @@ class TiingoProvider(DataProvider):
         
         try:
             # Tiingo uses different symbol format
-            clean_symbol = symbol.replace('.NS', '')
+            clean_symbol = normalize_symbol(symbol, 'bare')
             
             # Calculate start date
             if period == "5y":
@@ -204,20 +455,18 @@ class TiingoProvider(DataProvider):
                 'token': self.api_key
             }
             
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            response = self._get(url, params)
+            data = _parse_json(response)
             
             if not data:
                 logger.warning(f"No data returned for {symbol}")
                 return None
             
-            # Convert to DataFrame
-            df = pd.DataFrame(data)
-            df['date'] = pd.to_datetime(df['date'])
-            df = df.set_index('date').sort_index()
-            
-            close_prices = pd.to_numeric(df['close'], errors='coerce').dropna()
+            # Only date and close are used, so skip building a frame of every field
+            close_prices = pd.Series([row.get('close') for row in data],
+                                     index=pd.DatetimeIndex(pd.to_datetime([row['date'] for row in data]), name='date'),
+                                     name='close')
+            close_prices = pd.to_numeric(close_prices.sort_index(), errors='coerce').dropna()
             
             logger.info(f"Fetched {len(close_prices)} days of data for {symbol} from Tiingo")
             return close_prices
@@ -226,21 +475,21 @@ class TiingoProvider(DataProvider):
             logger.error(f"Tiingo error for {symbol}: {str(e)}")
             return None
     
+    @cached(ttl=PRICE_CACHE_TTL)
     def get_current_price(self, symbol: str) -> Optional[float]:
         """Get current price from Tiingo"""
         if not self.api_key:
             return None
         
         try:
-            clean_symbol = symbol.replace('.NS', '')
+            clean_symbol = normalize_symbol(symbol, 'bare')
             url = f"{self.base_url}/daily/{clean_symbol}/prices"
             params = {
                 'token': self.api_key
             }
             
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            response = self._get(url, params)
+            data = _parse_json(response)
             
             if data:
                 return float(data[0]['close'])
@@ -297,6 +546,25 @@ class MultiProviderDataFetcher:
         logger.error(f"All providers failed for {symbol}")
         return None
     
+    def fetch_many(self, symbols: List[str], period: str = "5y") -> Dict[str, Optional[pd.Series]]:
+        """Fetch several symbols concurrently, keyed by symbol (None where every provider failed)"""
+        unique_symbols = list(dict.fromkeys(symbols))
+        results = {}
+        
+        # Yahoo can return every symbol from one download; only the ones it
+        # misses go through the per-symbol provider chain below
+        if self.providers and isinstance(self.providers[0], YahooFinanceProvider):
+            results.update(self.providers[0].fetch_data_batch(unique_symbols, period))
+        remaining = [symbol for symbol in unique_symbols if symbol not in results]
+        
+        # The calls are I/O bound; each provider still spaces its own requests
+        if remaining:
+            max_workers = min(8, len(remaining))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results.update(zip(remaining, executor.map(lambda symbol: self.fetch_data(symbol, period),
+                                                            remaining)))
+        return {symbol: results[symbol] for symbol in unique_symbols}
+    
     def get_current_price(self, symbol: str) -> Optional[float]:
         """Try to get current price from available providers"""
         for provider in self.providers:
@@ -17,12 +17,18 @@ def ensure_nse_symbol(symbol: str) -> str:
 
 
 @lru_cache(maxsize=256)
-def _download_history_cached(symbol: str, period: str, interval: str) -> pd.DataFrame:
+def _download_history_cached_raw(symbol: str, period: str, interval: str) -> pd.DataFrame:
     if yf is None:
         raise RuntimeError("yfinance is not installed. Add it to requirements.txt")
     return yf.download(symbol, period=period, interval=interval, auto_adjust=False, progress=False, threads=False)
 
 
+def _download_history(symbol: str, period: str, interval: str) -> pd.DataFrame:
+    """Cached download keyed on the normalized NSE symbol, so 'reliance',
+    'RELIANCE' and 'RELIANCE.NS' share one entry."""
+    return _download_history_cached_raw(ensure_nse_symbol(symbol), period, interval)
+
+
 def fetch_close_series(symbol: str, years: int = 5) -> pd.Series:
     """Fetch daily close prices for a symbol from Yahoo Finance.
 
@@ -30,7 +36,7 @@ def fetch_close_series(symbol: str, years: int = 5) -> pd.Series:
     """
     sym = ensure_nse_symbol(symbol)
     period = f"{years}y"
-    df = _download_history_cached(sym, period=period, interval="1d")
+    df = _download_history(sym, period, "1d")
     if df is None or df.empty:
         raise ValueError(f"No price data returned for {sym}")
     # Ensure Date index and Close column
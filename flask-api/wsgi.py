@@ -0,0 +1,8 @@
+"""
+WSGI entry point for serving the RISKOS Flask API with gunicorn.
+
+Run from the flask-api directory:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from app import app
@@ -38,4 +38,5 @@ echo "To start the application:"
 echo "1. Start MongoDB (if not already running)"
 echo "2. Run: cd backend && npm start"
 echo "3. Run: cd frontend && npm run dev"
+echo "4. Run: cd flask-api && gunicorn -c gunicorn.conf.py wsgi:app"
 echo